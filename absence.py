@@ -0,0 +1,124 @@
+"""
+Absence Rollups
+Sick leave rolled up once at load time: per (employee, month) and per
+employee (total days, spells, long-term days, Bradford Factor). The
+per-employee figures are stored as columns of the employee table, so absence
+KPIs become vector reductions instead of scans of the sick leave table.
+
+The source has one row per employee and month, not one row per absence, so a
+spell is approximated as a month with at least MIN_SPELL_DAYS sick days. A run
+of consecutive long-term months counts as a single spell.
+"""
+
+import numpy as np
+import pandas as pd
+
+MIN_SPELL_DAYS = 1.0  # Months with less absence add to the days, not the spells
+BRADFORD_WINDOW_MONTHS = 12  # Bradford Factor is measured over the latest year of data
+# The usual Bradford trigger of 250 assumes every absence is its own spell. With
+# monthly data every month with MIN_SPELL_DAYS counts as a spell, so an ordinary
+# absence level spread over the year already scores far above 250. The trigger is
+# scaled to that approximation instead: the factor of an employee at the 5% sick
+# leave benchmark (11.5 of 230 working days) with spells in 9 of the 12 months.
+BRADFORD_SPELL_MONTHS = 9
+BRADFORD_BENCHMARK_DAYS = 11.5
+BRADFORD_THRESHOLD = BRADFORD_SPELL_MONTHS ** 2 * BRADFORD_BENCHMARK_DAYS  # 931.5, see DATA_MODEL.md
+
+# Employee columns added by add_employee_rollups()
+ROLLUP_COLUMNS = ['sick_days_total', 'sick_spells', 'long_term_sick_days', 'bradford_factor']
+
+
+def monthly_rollup(sick_leave):
+    """Sick days per (employee row, month), sorted by row then month
+
+    'row' is the employee's position in the employee table (the employee_row
+    key from data_store.add_row_keys) and 'period' a running month number
+    (year * 12 + month - 1). Rows for unknown employees are dropped.
+    """
+    rows = sick_leave['employee_row'].to_numpy()
+    known = rows >= 0
+    rows = rows[known].astype(np.int64)
+    period = (sick_leave['year'].to_numpy(dtype=np.int64) * 12 + sick_leave['month'].to_numpy(dtype=np.int64) - 1)[known]
+    days = sick_leave['sick_days'].to_numpy(dtype=float)[known]
+    long_term = (sick_leave['sick_leave_type'] == 'Long-term').to_numpy()[known]
+
+    if len(rows) == 0:
+        return pd.DataFrame({'row': rows, 'period': period, 'sick_days': days, 'long_term_days': days})
+
+    # One entry per (row, period); generated data is already in this order
+    first_period = period.min()
+    key = rows * (period.max() - first_period + 1) + (period - first_period)
+    if not (np.diff(key) > 0).all():
+        order = np.argsort(key, kind='stable')
+        key, rows, period, days, long_term = key[order], rows[order], period[order], days[order], long_term[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+
+    return pd.DataFrame({
+        'row': rows[starts],
+        'period': period[starts],
+        'sick_days': np.add.reduceat(days, starts),
+        'long_term_days': np.add.reduceat(np.where(long_term, days, 0.0), starts),
+    })
+
+
+def merge_monthly(monthly, appended):
+    """monthly_rollup() of old plus appended sick leave, from the two rollups
+
+    Months already in monthly are summed in place, new ones inserted in
+    order, so appending a month of sick leave costs one pass over the rollup
+    rather than a re-aggregation of the whole sick leave table.
+    """
+    if len(monthly) == 0:
+        return appended
+    key = _month_key(monthly)
+    new_key = _month_key(appended)
+    pos = np.searchsorted(key, new_key)
+    existing = (pos < len(key)) & (key[np.minimum(pos, len(key) - 1)] == new_key)
+
+    columns = {}
+    for col in ['row', 'period', 'sick_days', 'long_term_days']:
+        values = monthly[col].to_numpy().copy()
+        added = appended[col].to_numpy()
+        if col in ('sick_days', 'long_term_days'):
+            values[pos[existing]] += added[existing]  # Keys are unique, so no index repeats
+        columns[col] = np.insert(values, pos[~existing], added[~existing])
+    return pd.DataFrame(columns)
+
+
+def _month_key(monthly):
+    """Sort key per monthly row: row, then period"""
+    return monthly['row'].to_numpy(dtype=np.int64) * (1 << 20) + monthly['period'].to_numpy(dtype=np.int64)
+
+
+def spell_starts(monthly):
+    """Boolean per monthly row: the month starts a new absence spell"""
+    row = monthly['row'].to_numpy()
+    period = monthly['period'].to_numpy()
+    is_spell = monthly['sick_days'].to_numpy() >= MIN_SPELL_DAYS
+    is_long = monthly['long_term_days'].to_numpy() > 0
+
+    # A long-term month directly after another long-term month continues that spell
+    continues = np.zeros(len(monthly), dtype=bool)
+    continues[1:] = (is_long[1:] & is_long[:-1] & is_spell[:-1]
+                     & (row[1:] == row[:-1]) & (period[1:] == period[:-1] + 1))
+    return is_spell & ~continues
+
+
+def add_employee_rollups(employees, monthly):
+    """Add the ROLLUP_COLUMNS to employees (in place) from the monthly rollup"""
+    n = len(employees)
+    row = monthly['row'].to_numpy()
+    days = monthly['sick_days'].to_numpy()
+    starts = spell_starts(monthly)
+
+    # Bradford Factor S² × D over the latest BRADFORD_WINDOW_MONTHS months in the data
+    period = monthly['period'].to_numpy()
+    in_window = period > period.max() - BRADFORD_WINDOW_MONTHS if len(period) else np.zeros(0, dtype=bool)
+    window_spells = np.bincount(row[starts & in_window], minlength=n)
+    window_days = np.bincount(row[in_window], weights=days[in_window], minlength=n)
+
+    employees['sick_days_total'] = np.bincount(row, weights=days, minlength=n)
+    employees['sick_spells'] = np.bincount(row[starts], minlength=n).astype(np.int32)
+    employees['long_term_sick_days'] = np.bincount(row, weights=monthly['long_term_days'].to_numpy(), minlength=n)
+    employees['bradford_factor'] = window_spells.astype(float) ** 2 * window_days
+    return employees
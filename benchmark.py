@@ -0,0 +1,295 @@
+"""
+Scale Benchmark
+Generates datasets of increasing size with generate_data.py, then times the
+analytics engine directly and the full dashboard headlessly (Streamlit
+AppTest) over a fixed matrix of filters, simulator scenarios and chat
+questions, and writes per-stage timings to JSON:
+
+    python benchmark.py [--sizes 5000 50000 500000 5000000] [--output benchmark_results.json]
+
+Stage names match the perf.timed() blocks in app.py and the hr_engine
+functions behind them. Compare two result files to spot regressions between
+versions.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import data_store
+import generate_data
+import hr_engine
+import perf
+from dataset import load_dataset
+from kpi_cache import KPI_CACHE, TAB_CACHE
+
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(BASE_PATH, 'app.py')
+
+SIZES = [5_000, 50_000, 500_000, 5_000_000]
+
+# Sidebar selectbox label per filter dimension
+FILTER_LABELS = {
+    'country': "🌍 Land",
+    'department': "🏢 Avdeling",
+    'seniority_level': "📊 Senioritetsnivå",
+    'job_family': "👔 Rollefamilie",
+}
+
+FILTER_MATRIX = [
+    {},
+    {'country': 'Norge'},
+    {'department': 'Engineering'},
+    {'country': 'Tyskland', 'department': 'Engineering'},
+    {'seniority_level': 'Senior', 'job_family': 'Individual Contributor'},
+    {'country': 'Sverige', 'department': 'Sales', 'seniority_level': 'Mid', 'job_family': 'Individual Contributor'},
+]
+
+SIMULATOR_SCENARIOS = [
+    {'salary_increase': 0, 'training_increase': 0, 'engagement_program': False},
+    {'salary_increase': 5, 'training_increase': 10, 'engagement_program': False},
+    {'salary_increase': 15, 'training_increase': 30, 'engagement_program': True},
+]
+
+# Lazy tab mode (app.py VIEWS) - the view selector value that renders each tab
+VIEW_LABELS = {
+    'tab_overview': "📊 Overview",
+    'tab_turnover': "📈 Turnover",
+    'tab_workforce': "👥 Workforce",
+    'tab_compensation': "💰 Compensation",
+    'tab_recruitment': "🎯 Recruitment",
+    'tab_simulator': "🔮 What-If Simulator",
+    'tab_chat': "💬 Chat med Data",
+}
+
+ENGINE_TABS = {
+    'tab_overview': hr_engine.overview,
+    'tab_turnover': hr_engine.turnover,
+    'tab_workforce': hr_engine.workforce,
+    'tab_compensation': hr_engine.compensation,
+    'tab_recruitment': hr_engine.recruitment,
+}
+
+
+def widget(widgets, label):
+    """The AppTest widget with the given label"""
+    for w in widgets:
+        if w.label == label:
+            return w
+    raise KeyError(label)
+
+
+def ensure_dataset(work_dir, size, file_format, shards):
+    """Generate the dataset for size once; returns (data_path, generation seconds or None if reused)"""
+    data_path = os.path.join(work_dir, f'employees-{size}')
+    if os.path.exists(data_store.parquet_path(data_path, 'employees')) or \
+            os.path.exists(data_store.csv_path(data_path, 'employees')):
+        return data_path, None
+    start = time.perf_counter()
+    generate_data.write_dataset(data_path, size, file_format=file_format, shards=shards)
+    return data_path, time.perf_counter() - start
+
+
+def run_app(at):
+    """One scripted rerun; returns (wall seconds, stage timings of this run)"""
+    perf.reset()
+    KPI_CACHE.clear()  # Measure computation, not cache hits
+    TAB_CACHE.clear()
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    stages = {name: float(np.sum(values)) for name, values in perf.samples().items()}
+    return elapsed, stages
+
+
+def second_session(timeout):
+    """Run a second session against the process-wide dataset; returns its memory gauges"""
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.session_state['password_correct'] = True
+    run_app(at)
+    return perf.gauges()
+
+
+def benchmark_size(data_path, timeout):
+    """Time every pipeline stage for one dataset (each view selected in turn per filter combination)"""
+    os.environ['HR_DATA_DIR'] = data_path
+    os.environ['HR_TAB_MODE'] = 'lazy'
+    st.cache_resource.clear()
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.session_state['password_correct'] = True
+    first_run, first_stages = run_app(at)
+    memory = perf.gauges()
+    runs = []
+
+    for filters in FILTER_MATRIX:
+        for dim, label in FILTER_LABELS.items():
+            widget(at.sidebar.selectbox, label).set_value(filters.get(dim, 'Alle'))
+        stages, reruns = {}, {}
+        for name, view in VIEW_LABELS.items():
+            at.radio(key='view').set_value(view)
+            reruns[name], view_stages = run_app(at)
+            stages.update(view_stages)  # Shared stages keep the last view's timing
+        runs.append({'filters': filters, 'rerun': reruns, 'stages': stages})
+
+    # Simulator and chat on the unfiltered view
+    for label in FILTER_LABELS.values():
+        widget(at.sidebar.selectbox, label).set_value('Alle')
+    simulator = []
+    at.radio(key='view').set_value(VIEW_LABELS['tab_simulator']).run()
+    for scenario in SIMULATOR_SCENARIOS:
+        widget(at.slider, "Lønnsøkning (%)").set_value(scenario['salary_increase'])
+        widget(at.slider, "Økt opplæring (timer)").set_value(scenario['training_increase'])
+        widget(at.checkbox, "Implementer engasjementsprogram (+0.5 score)").set_value(scenario['engagement_program'])
+        rerun, stages = run_app(at)
+        simulator.append({'scenario': scenario, 'rerun': rerun, 'seconds': stages.get('tab_simulator')})
+
+    chat = []
+    at.radio(key='view').set_value(VIEW_LABELS['tab_chat']).run()
+    for question in hr_engine.EXAMPLE_QUESTIONS:
+        widget(at.text_input, "Skriv ditt spørsmål her:").set_value(question)
+        rerun, stages = run_app(at)
+        chat.append({'question': question, 'rerun': rerun, 'seconds': stages.get('answer_question')})
+
+    all_stages = {}
+    for run in runs:
+        for name, seconds in run['stages'].items():
+            all_stages.setdefault(name, []).append(seconds)
+    summary = {name: perf.summarize(values) for name, values in all_stages.items()}
+    summary['rerun'] = perf.summarize([seconds for run in runs for seconds in run['rerun'].values()])
+    summary['answer_question'] = perf.summarize([c['seconds'] for c in chat])
+    summary['simulator'] = perf.summarize([s['seconds'] for s in simulator])
+
+    # A second session reuses the loaded dataset (no load_data stage) and adds only its own state
+    other = second_session(timeout)
+    memory['second_session_bytes'] = other['session_bytes']
+    memory['shared_dataset'] = 'load_data' not in perf.samples()
+
+    return {
+        'first_run': first_run,
+        'load_data': first_stages.get('load_data'),
+        'memory': memory,
+        'runs': runs,
+        'simulator': simulator,
+        'chat': chat,
+        'summary': summary,
+    }
+
+
+def benchmark_engine(data_path, repeat):
+    """Time the analytics engine directly, without Streamlit (best of repeat per call)"""
+    def best(fn):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    start = time.perf_counter()
+    dataset = load_dataset(data_path)
+    result = {'load_dataset': time.perf_counter() - start, 'runs': [], 'chat': [], 'simulator': []}
+
+    for filters in FILTER_MATRIX:
+        spec = hr_engine.FilterSpec(**filters)
+        kpis = hr_engine.calculate_kpis(dataset, spec)
+        stages = {
+            'apply_filters': best(lambda: hr_engine.filtered_rows(dataset, spec)),
+            'calculate_kpis': best(lambda: hr_engine.calculate_kpis(dataset, spec)),
+            'detect_red_flags': best(lambda: hr_engine.detect_red_flags(kpis)),
+        }
+        for name, tab in ENGINE_TABS.items():
+            stages[name] = best(lambda: tab(dataset, spec))
+        result['runs'].append({'filters': filters, 'stages': stages})
+
+    spec = hr_engine.FilterSpec()
+    kpis = hr_engine.calculate_kpis(dataset, spec)
+    for question in hr_engine.EXAMPLE_QUESTIONS:
+        result['chat'].append({'question': question,
+                               'seconds': best(lambda: hr_engine.answer_question(dataset, spec, question, kpis))})
+    for scenario in SIMULATOR_SCENARIOS:
+        result['simulator'].append({'scenario': scenario, 'seconds': best(lambda: hr_engine.simulate(
+            hr_engine.high_risk_segment(dataset, spec), **scenario))})
+    result['scan_segments'] = best(lambda: hr_engine.scan_segments(dataset))
+    result['peer_anomalies'] = best(lambda: hr_engine.peer_anomalies(dataset))
+
+    stage_names = result['runs'][0]['stages']
+    result['summary'] = {name: perf.summarize([run['stages'][name] for run in result['runs']]) for name in stage_names}
+    result['summary']['answer_question'] = perf.summarize([c['seconds'] for c in result['chat']])
+    result['summary']['simulator'] = perf.summarize([s['seconds'] for s in result['simulator']])
+    result['summary']['scan_segments'] = perf.summarize([result['scan_segments']])
+    result['summary']['peer_anomalies'] = perf.summarize([result['peer_anomalies']])
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_PATH,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'streamlit': st.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard pipeline at increasing data sizes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="Employee counts to benchmark")
+    parser.add_argument('--work-dir', default=os.path.join(BASE_PATH, 'benchmark_data'),
+                        help="Where generated datasets are kept (reused between runs)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='parquet')
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 1, help="Processes used for generation")
+    parser.add_argument('--timeout', type=float, default=1800, help="Seconds allowed per scripted rerun")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions per engine call (best is kept)")
+    parser.add_argument('--skip-app', action='store_true', help="Only time the engine, not the Streamlit reruns")
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args()
+
+    results = {'environment': environment(), 'sizes': []}
+    for size in args.sizes:
+        print(f"== {size:,} employees")
+        data_path, generate_seconds = ensure_dataset(args.work_dir, size, args.format, args.shards)
+        result = {'employees': size, 'generate_data': generate_seconds,
+                  'engine': benchmark_engine(data_path, args.repeat)}
+        if not args.skip_app:
+            result['app'] = benchmark_size(data_path, args.timeout)
+        results['sizes'].append(result)
+
+        if 'app' in result:
+            memory = result['app']['memory']
+            print(f"   [memory] dataset {memory['dataset_bytes'] / 1e6:,.1f} MB shared, "
+                  f"session {memory['session_bytes'] / 1e3:,.1f} KB / {memory['second_session_bytes'] / 1e3:,.1f} KB")
+        for part in ('engine', 'app'):
+            if part not in result:
+                continue
+            print(f"   [{part}]")
+            for name, stats in sorted(result[part]['summary'].items()):
+                print(f"   {name:<20} mean {stats['mean'] * 1000:9.1f} ms   p95 {stats['p95'] * 1000:9.1f} ms")
+
+        # Written after every size so a long run still leaves usable numbers
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
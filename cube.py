@@ -0,0 +1,214 @@
+"""
+KPI Cube
+Additive aggregates per country x department x seniority x job family cell,
+built once at load time. KPIs for any filter combination are derived by
+summing the selected cells, so they no longer scan the employee table.
+"""
+
+import numpy as np
+import pandas as pd
+
+from absence import BRADFORD_THRESHOLD
+from data_store import FILTER_DIMENSIONS
+
+# Measures summed per cell. Everything here must be additive - averages and
+# rates are derived from these sums in kpis_from_totals().
+MEASURES = [
+    # Active employees
+    'headcount', 'tenure_sum', 'salary_sum', 'salary_sq', 'engagement_sum', 'engagement_sq',
+    'performance_sum', 'training_sum', 'compa_sum', 'high_flight_risk', 'internal_movers',
+    'gender_m', 'gender_f', 'management', 'management_female', 'sick_days',
+    'long_term_sick_days', 'sick_spells', 'bradford_sum', 'bradford_high',
+    'direct_reports', 'people_managers',
+    # All employees (active + terminated)
+    'all_headcount', 'terminated',
+    # Terminations table
+    'voluntary_terminations', 'replacement_cost',
+    # Recruitment table
+    'requisitions', 'days_to_fill_sum',
+]
+
+MANAGEMENT_FAMILIES = ['Management', 'Executive']
+WORKING_DAYS_PER_YEAR = 230
+
+
+class KPICube:
+    """Dense array of additive measures indexed by the four filter dimensions"""
+
+    def __init__(self, categories, values):
+        self.categories = categories  # dimension -> list of category values
+        self.shape = tuple(len(categories[dim]) for dim in FILTER_DIMENSIONS)
+        self.values = values  # shape + (len(MEASURES),)
+
+    @classmethod
+    def build(cls, employees, recruitment, terminations):
+        """Aggregate the tables; employees must already carry the absence.ROLLUP_COLUMNS and direct_reports"""
+        categories = {dim: list(employees[dim].cat.categories) for dim in FILTER_DIMENSIONS}
+        shape = tuple(len(categories[dim]) for dim in FILTER_DIMENSIONS)
+        n_cells = int(np.prod(shape))
+
+        emp_cell = _cell_index(employees, categories, shape)
+        active = employees['termination_date'].isna().to_numpy()
+        valid = emp_cell >= 0
+        cell = emp_cell[valid & active]
+        act = employees[valid & active]
+
+        def cell_sum(cells, weights=None):
+            return np.bincount(cells, weights=weights, minlength=n_cells).astype(float)
+
+        band_mid = (act['salary_band_min'] + act['salary_band_max']).to_numpy(dtype=float) / 2
+        salary = act['salary'].to_numpy(dtype=float)
+        engagement = act['engagement_score'].to_numpy(dtype=float)
+        is_management = act['job_family'].isin(MANAGEMENT_FAMILIES).to_numpy()
+        is_female = (act['gender'] == 'F').to_numpy()
+
+        # Absence comes from the per-employee rollup columns (see absence.py);
+        # terminations are attributed to the employee's cell
+        bradford = act['bradford_factor'].to_numpy(dtype=float)
+        term_rows = terminations['employee_row'].to_numpy()
+        term_ok = (term_rows >= 0)
+        term_ok[term_ok] = valid[term_rows[term_ok]]
+        term_cell = emp_cell[term_rows[term_ok]]
+        voluntary = (terminations['termination_reason'] == 'Voluntary').to_numpy()[term_ok]
+
+        recruit_cell = _cell_index(recruitment, categories, shape)
+        recruit_ok = recruit_cell >= 0
+
+        measures = {
+            'headcount': cell_sum(cell),
+            'tenure_sum': cell_sum(cell, act['tenure_years'].to_numpy(dtype=float)),
+            'salary_sum': cell_sum(cell, salary),
+            'salary_sq': cell_sum(cell, salary ** 2),
+            'engagement_sum': cell_sum(cell, engagement),
+            'engagement_sq': cell_sum(cell, engagement ** 2),
+            'performance_sum': cell_sum(cell, act['performance_rating'].to_numpy(dtype=float)),
+            'training_sum': cell_sum(cell, act['training_hours_ytd'].to_numpy(dtype=float)),
+            'compa_sum': cell_sum(cell, salary / band_mid),
+            'high_flight_risk': cell_sum(cell[(act['flight_risk'] == 'High').to_numpy()]),
+            'internal_movers': cell_sum(cell[(act['internal_moves'] > 0).to_numpy()]),
+            'gender_m': cell_sum(cell[(act['gender'] == 'M').to_numpy()]),
+            'gender_f': cell_sum(cell[is_female]),
+            'management': cell_sum(cell[is_management]),
+            'management_female': cell_sum(cell[is_management & is_female]),
+            'sick_days': cell_sum(cell, act['sick_days_total'].to_numpy(dtype=float)),
+            'long_term_sick_days': cell_sum(cell, act['long_term_sick_days'].to_numpy(dtype=float)),
+            'sick_spells': cell_sum(cell, act['sick_spells'].to_numpy(dtype=float)),
+            'bradford_sum': cell_sum(cell, bradford),
+            'bradford_high': cell_sum(cell[bradford > BRADFORD_THRESHOLD]),
+            'direct_reports': cell_sum(cell, act['direct_reports'].to_numpy(dtype=float)),
+            'people_managers': cell_sum(cell[(act['direct_reports'] > 0).to_numpy()]),
+            'all_headcount': cell_sum(emp_cell[valid]),
+            'terminated': cell_sum(emp_cell[valid & ~active]),
+            'voluntary_terminations': cell_sum(term_cell[voluntary]),
+            'replacement_cost': cell_sum(term_cell, terminations['replacement_cost'].to_numpy(dtype=float)[term_ok]),
+            'requisitions': cell_sum(recruit_cell[recruit_ok]),
+            'days_to_fill_sum': cell_sum(recruit_cell[recruit_ok], recruitment['days_to_fill'].to_numpy(dtype=float)[recruit_ok]),
+        }
+        values = np.stack([measures[m] for m in MEASURES], axis=-1).reshape(shape + (len(MEASURES),))
+        return cls(categories, values)
+
+    def totals(self, selection):
+        """Sum every measure over the cells matching selection (dimension -> value, list or None)"""
+        block = self.values[np.ix_(*_selection_index(self.categories, selection))]
+        sums = block.reshape(-1, len(MEASURES)).sum(axis=0)
+        return dict(zip(MEASURES, sums))
+
+
+def _selection_index(categories, selection):
+    """Category positions per dimension for selection; None selects every category"""
+    index = []
+    for dim in FILTER_DIMENSIONS:
+        selected = selection.get(dim)
+        if selected is None:
+            index.append(np.arange(len(categories[dim])))
+            continue
+        if isinstance(selected, str):
+            selected = [selected]
+        index.append(np.array([categories[dim].index(v) for v in selected if v in categories[dim]], dtype=int))
+    return index
+
+
+def _cell_index(df, categories, shape):
+    """Flat cube cell for every row of df, -1 where a dimension value is unknown"""
+    codes = []
+    for dim in FILTER_DIMENSIONS:
+        values = df[dim]
+        if isinstance(values.dtype, pd.CategoricalDtype) and list(values.cat.categories) == categories[dim]:
+            codes.append(values.cat.codes.to_numpy())
+        else:
+            codes.append(pd.Categorical(values, categories=categories[dim]).codes)
+    codes = np.stack(codes)
+    valid = (codes >= 0).all(axis=0)
+    cells = np.full(len(df), -1, dtype=np.int64)
+    cells[valid] = np.ravel_multi_index(codes[:, valid], shape)
+    return cells
+
+
+def _ratio(numerator, denominator, scale=1.0):
+    if np.ndim(denominator) == 0:
+        return numerator / denominator * scale if denominator > 0 else 0
+    # Arrays of cells: 0 where the denominator is empty
+    ratio = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=ratio, where=denominator > 0)
+    return ratio * scale
+
+
+def _count(total):
+    """Summed count as an int, or unchanged for an array of cells"""
+    return int(total) if np.ndim(total) == 0 else total
+
+
+def kpis_from_totals(t):
+    """Derive the dashboard KPIs from summed cube measures
+
+    The measures may also be arrays (one value per cell, see segments.py);
+    every KPI is then an array of the same shape.
+    """
+    headcount = t['headcount']
+    kpis = {}
+
+    kpis['headcount'] = _count(headcount)
+    kpis['avg_tenure'] = _ratio(t['tenure_sum'], headcount)
+    kpis['avg_salary'] = _ratio(t['salary_sum'], headcount)
+    kpis['salary_std'] = np.sqrt(np.maximum(_ratio(t['salary_sq'], headcount) - kpis['avg_salary'] ** 2, 0))
+
+    # Turnover rate (annualized)
+    avg_headcount = t['all_headcount'] - t['terminated'] / 2
+    kpis['turnover_rate'] = _ratio(t['terminated'], avg_headcount, 100)
+
+    kpis['voluntary_turnover'] = _count(t['voluntary_terminations'])
+    kpis['voluntary_turnover_rate'] = _ratio(t['voluntary_terminations'], headcount, 100)
+
+    kpis['avg_engagement'] = _ratio(t['engagement_sum'], headcount)
+    kpis['engagement_std'] = np.sqrt(np.maximum(_ratio(t['engagement_sq'], headcount) - kpis['avg_engagement'] ** 2, 0))
+    kpis['avg_performance'] = _ratio(t['performance_sum'], headcount)
+
+    kpis['high_flight_risk'] = _count(t['high_flight_risk'])
+    kpis['flight_risk_pct'] = _ratio(t['high_flight_risk'], headcount, 100)
+
+    kpis['avg_time_to_hire'] = _ratio(t['days_to_fill_sum'], t['requisitions'])
+
+    kpis['sick_leave_rate'] = _ratio(t['sick_days'], WORKING_DAYS_PER_YEAR * headcount, 100)
+    kpis['long_term_sick_pct'] = _ratio(t['long_term_sick_days'], t['sick_days'], 100)
+    kpis['sick_spells_per_employee'] = _ratio(t['sick_spells'], headcount)
+    kpis['avg_bradford'] = _ratio(t['bradford_sum'], headcount)
+    kpis['bradford_high_pct'] = _ratio(t['bradford_high'], headcount, 100)
+
+    kpis['internal_mobility'] = _ratio(t['internal_movers'], headcount, 100)
+    kpis['cost_of_attrition'] = t['replacement_cost']
+
+    kpis['gender_m'] = _count(t['gender_m'])
+    kpis['gender_f'] = _count(t['gender_f'])
+    kpis['gender_balance'] = _ratio(t['gender_f'], headcount, 100)
+
+    kpis['management_headcount'] = _count(t['management'])
+    kpis['female_management_pct'] = _ratio(t['management_female'], t['management'], 100)
+
+    # Span of control (average active direct reports per active people manager)
+    kpis['people_managers'] = _count(t['people_managers'])
+    kpis['span_of_control'] = _ratio(t['direct_reports'], t['people_managers'])
+
+    kpis['avg_training_hours'] = _ratio(t['training_sum'], headcount)
+    kpis['avg_compa_ratio'] = _ratio(t['compa_sum'], headcount)
+
+    return kpis
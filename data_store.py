@@ -0,0 +1,328 @@
+"""
+HR Data Store
+Reads the four HR tables from a columnar (Parquet) copy when one exists,
+falling back to the original CSV files. Run as a script to convert CSVs:
+
+    python data_store.py [data_dir] [output_dir] [--memory-report]
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+TABLES = ['employees', 'sick_leave', 'recruitment', 'terminations']
+
+# Date columns per table - parsed once when converting, so the columnar
+# copy already stores them as timestamps
+DATE_COLUMNS = {
+    'employees': ['hire_date', 'termination_date', 'last_promotion_date'],
+    'sick_leave': [],
+    'recruitment': ['open_date', 'close_date'],
+    'terminations': ['termination_date'],
+}
+
+SENIORITY_ORDER = ['Junior', 'Mid', 'Senior', 'Lead', 'Director', 'VP', 'C-Level']
+AGE_GROUP_ORDER = ['<25', '25-34', '35-44', '45-54', '55+']
+FLIGHT_RISK_ORDER = ['Low', 'Medium', 'High']
+
+# Replacement cost of a leaver as a multiple of salary, by seniority (1.5 for the rest)
+REPLACEMENT_COST_MULTIPLIER = {'Senior': 2.0, 'Lead': 2.0, 'Director': 2.5, 'VP': 2.5, 'C-Level': 2.5}
+DEFAULT_REPLACEMENT_MULTIPLIER = 1.5
+
+# Low-cardinality employee columns stored as ordered Categoricals.
+# None means the categories are the sorted values found in the data.
+EMPLOYEE_CATEGORIES = {
+    'department': None,
+    'country': None,
+    'location_city': None,
+    'job_family': None,
+    'job_title': None,
+    'seniority_level': SENIORITY_ORDER,
+    'gender': None,
+    'age_group': AGE_GROUP_ORDER,
+    'flight_risk': FLIGHT_RISK_ORDER,
+}
+
+# Employee columns the sidebar filters on
+FILTER_DIMENSIONS = ['country', 'department', 'seniority_level', 'job_family']
+
+# (table, employee id column, added row column): integer positions into the
+# employee table, resolved once at load so joins are numpy takes, not string lookups
+EMPLOYEE_ROW_KEYS = [
+    ('employees', 'manager_id', 'manager_row'),
+    ('sick_leave', 'employee_id', 'employee_row'),
+    ('recruitment', 'hired_employee_id', 'hired_employee_row'),
+    ('terminations', 'employee_id', 'employee_row'),
+]
+
+# Tables the HRIS extends by appending rows (a month of sick leave, new
+# terminations). When only their CSV files grow, the new rows are ingested
+# incrementally instead of reloading everything.
+APPEND_TABLES = ['sick_leave', 'terminations']
+
+# Columns appended rows must fill in, and which of them must be numeric
+APPEND_REQUIRED = {
+    'sick_leave': ['employee_id', 'year', 'month', 'sick_days', 'sick_leave_type'],
+    'terminations': ['employee_id', 'termination_date', 'termination_reason', 'replacement_cost'],
+}
+APPEND_NUMERIC = ['year', 'month', 'sick_days', 'replacement_cost']
+
+# Bytes just before the previous end of a file that must be unchanged for growth to count as an append
+TAIL_BYTES = 4096
+
+
+def find_data_path(base_path):
+    """Return the folder holding the data files ('data' subfolder first, then base_path)"""
+    data_path = os.path.join(base_path, 'data')
+    if os.path.exists(csv_path(data_path, 'employees')) or os.path.exists(parquet_path(data_path, 'employees')):
+        return data_path
+    return base_path  # Files are in root folder
+
+
+def parquet_path(data_path, name):
+    return os.path.join(data_path, f'{name}.parquet')
+
+
+def csv_path(data_path, name):
+    return os.path.join(data_path, f'{name}.csv')
+
+
+def source_path(data_path, name):
+    """The file read_table() reads: the Parquet copy if there is one, otherwise the CSV
+
+    A Parquet copy older than its CSV (e.g. after generate_data.py rewrote
+    the CSVs) is stale: the CSV is read instead, with a warning.
+    """
+    path, csv = parquet_path(data_path, name), csv_path(data_path, name)
+    if not os.path.exists(path):
+        return csv
+    if os.path.exists(csv) and os.stat(csv).st_mtime_ns > os.stat(path).st_mtime_ns:
+        warnings.warn(f"{path} is older than {csv}; reading the CSV (run data_store.py to refresh the Parquet copy)",
+                      stacklevel=2)
+        return csv
+    return path
+
+
+def parse_dates(df, name):
+    """Parse the DATE_COLUMNS of a table read from CSV (in place)"""
+    for col in DATE_COLUMNS[name]:
+        df[col] = pd.to_datetime(df[col], format='%Y-%m-%d')
+    return df
+
+
+def read_csv_table(data_path, name):
+    """Read one table from CSV and parse its date columns"""
+    return parse_dates(pd.read_csv(csv_path(data_path, name)), name)
+
+
+def read_table(data_path, name):
+    """Read one table, preferring the Parquet copy (memory-mapped) over CSV"""
+    path = source_path(data_path, name)
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, engine='pyarrow', memory_map=True)
+    return read_csv_table(data_path, name)
+
+
+def apply_categories(employees):
+    """Convert the low-cardinality employee columns to ordered Categoricals (in place)"""
+    for col, order in EMPLOYEE_CATEGORIES.items():
+        values = employees[col]
+        found = values.cat.categories.tolist() if isinstance(values.dtype, pd.CategoricalDtype) \
+            else values.dropna().unique().tolist()
+        if order is None:
+            categories = sorted(found)
+        else:
+            # Keep the declared order, but never turn unexpected values into NaN
+            categories = list(order) + sorted(set(found) - set(order))
+        dtype = pd.CategoricalDtype(categories, ordered=True)
+        if values.dtype != dtype:
+            employees[col] = values.astype(dtype)
+    return employees
+
+
+def add_row_keys(tables):
+    """Add the EMPLOYEE_ROW_KEYS columns (in place; -1 where the id is missing or unknown)"""
+    employee_ids = pd.Index(tables['employees']['employee_id'])
+    for name, id_column, row_column in EMPLOYEE_ROW_KEYS:
+        tables[name][row_column] = employee_ids.get_indexer(tables[name][id_column]).astype('int32')
+    return tables
+
+
+def apply_terminations(employees, terminations):
+    """Fill in termination_date for employees with a termination record but no date (in place)
+
+    The HRIS appends terminations before the employee table catches up, so a
+    termination record ends the employment on its own. An employee's first
+    record wins. Returns the employee rows that were updated.
+    """
+    rows = terminations['employee_row'].to_numpy()
+    dates = employees['termination_date']
+    rows, first = np.unique(rows, return_index=True)
+    update = (rows >= 0)
+    update[update] = dates.isna().to_numpy()[rows[update]]
+    if update.any():
+        values = dates.to_numpy().copy()
+        values[rows[update]] = terminations['termination_date'].to_numpy()[first[update]].astype(values.dtype)
+        employees['termination_date'] = values
+    return rows[update]
+
+
+def _file_tail(path, size):
+    """Header line plus the TAIL_BYTES before size - unchanged as long as a file is only appended to"""
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(max(size - TAIL_BYTES, 0))
+        tail = f.read(min(size, TAIL_BYTES))
+    return hashlib.sha1(header + tail).hexdigest()
+
+
+def file_state(data_path):
+    """Per table: the file load_tables() reads, its size, mtime and (CSV only) a tail fingerprint"""
+    state = {}
+    for name in TABLES:
+        path = source_path(data_path, name)
+        stat = os.stat(path)
+        tail = _file_tail(path, stat.st_size) if path.endswith('.csv') else None
+        state[name] = {'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'tail': tail}
+    return state
+
+
+def state_version(state):
+    """Short fingerprint of a file_state() - the dataset version used in cache keys"""
+    digest = hashlib.sha1()
+    for name in TABLES:
+        entry = state[name]
+        digest.update(f"{entry['path']}:{entry['size']}:{entry['mtime_ns']};".encode())
+    return digest.hexdigest()[:12]
+
+
+def data_version(data_path):
+    """Short fingerprint of the files load_tables() would read (path, size, mtime)"""
+    return state_version(file_state(data_path))
+
+
+def appended_tables(old_state, new_state):
+    """Tables whose CSV has grown by appends only since old_state, or None if anything else changed
+
+    Growth counts as an append when the header and the bytes before the old
+    end of file are unchanged. Every other change (a rewritten or shrunk file,
+    a new Parquet copy, a change to a table outside APPEND_TABLES) needs a
+    full reload.
+    """
+    appended = []
+    for name in TABLES:
+        old, new = old_state[name], new_state[name]
+        if old == new:
+            continue
+        if (name not in APPEND_TABLES or new['path'] != old['path'] or old['tail'] is None
+                or new['size'] <= old['size'] or _file_tail(new['path'], old['size']) != old['tail']):
+            return None
+        appended.append(name)
+    return appended
+
+
+def read_appended_rows(name, entry):
+    """Parse and validate the complete CSV lines after the end of file recorded in entry
+
+    entry is the table's file_state() entry from the last read. Returns the
+    new rows (dates parsed) and the entry for the data read so far; a line
+    still being written is left for the next read. Raises ValueError when the
+    rows do not match the table.
+    """
+    path, offset = entry['path'], entry['size']
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        chunk = f.read()
+    end = offset + chunk.rfind(b'\n') + 1
+    rows = pd.read_csv(io.BytesIO(header + chunk[:end - offset]))
+
+    missing = [col for col in APPEND_REQUIRED[name] if col not in rows.columns]
+    if missing:
+        raise ValueError(f"{name}: appended rows lack columns {missing}")
+    incomplete = rows[APPEND_REQUIRED[name]].isna().any(axis=1)
+    if incomplete.any():
+        raise ValueError(f"{name}: {int(incomplete.sum())} appended rows have empty required fields")
+    for col in APPEND_NUMERIC:
+        if len(rows) and col in rows.columns and not pd.api.types.is_numeric_dtype(rows[col]):
+            raise ValueError(f"{name}: column {col} of the appended rows is not numeric")
+    if name == 'sick_leave' and not rows['month'].between(1, 12).all():
+        raise ValueError("sick_leave: appended rows have a month outside 1-12")
+
+    read_to = {'path': path, 'size': end, 'mtime_ns': os.stat(path).st_mtime_ns, 'tail': _file_tail(path, end)}
+    return parse_dates(rows, name), read_to
+
+
+def load_tables(data_path):
+    """Load employees, sick leave, recruitment and terminations from data_path"""
+    tables = {name: read_table(data_path, name) for name in TABLES}
+    apply_categories(tables['employees'])
+    add_row_keys(tables)
+    apply_terminations(tables['employees'], tables['terminations'])
+    return tuple(tables[name] for name in TABLES)
+
+
+def memory_report(before, after):
+    """Per-column resident size (bytes) of a table before and after applying the schema"""
+    report = pd.DataFrame({
+        'before': before.memory_usage(index=False, deep=True),
+        'after': after.memory_usage(index=False, deep=True),
+    })
+    report.loc['TOTAL'] = report.sum()
+    report['ratio'] = (report['before'] / report['after']).round(1)
+    return report
+
+
+def write_parquet(df, path):
+    """Write a DataFrame as Parquet with dictionary-encoded string columns"""
+    df.to_parquet(path, engine='pyarrow', index=False, use_dictionary=True, compression='zstd')
+
+
+def convert_to_parquet(data_path, output_path=None):
+    """Convert the CSV tables in data_path to typed Parquet files"""
+    output_path = output_path or data_path
+    os.makedirs(output_path, exist_ok=True)
+
+    written = []
+    for name in TABLES:
+        df = read_csv_table(data_path, name)
+        if name == 'employees':
+            apply_categories(df)
+        path = parquet_path(output_path, name)
+        write_parquet(df, path)
+        written.append((name, len(df), path))
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert HR CSV files to Parquet")
+    parser.add_argument('source', nargs='?', default=find_data_path(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument('target', nargs='?', default=None)
+    parser.add_argument('--memory-report', action='store_true',
+                        help="Print employee memory usage before and after the categorical schema")
+    args = parser.parse_args()
+    target = args.target or args.source
+
+    if args.memory_report:
+        raw = read_csv_table(args.source, 'employees')
+        typed = apply_categories(raw.copy())
+        report = memory_report(raw, typed)
+        print(f"Employee memory usage ({len(raw)} rows, MB):")
+        print((report[['before', 'after']] / 1e6).round(3).assign(ratio=report['ratio']).to_string())
+        print()
+
+    print(f"Converting CSV files in {args.source} to Parquet...")
+    start = time.perf_counter()
+    for name, rows, path in convert_to_parquet(args.source, target):
+        print(f"- {name}: {rows} records -> {path}")
+    print(f"\nConversion complete in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    load_tables(target)
+    print(f"Columnar load time: {time.perf_counter() - start:.3f}s")
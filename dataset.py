@@ -0,0 +1,199 @@
+"""
+HR Dataset
+Bundles the four HR tables with the structures derived from them at load
+time, so the dashboard builds them once per data load instead of per rerun.
+The dashboard keeps a single Dataset per process and shares it between all
+sessions, so nothing may modify it after construction. New data arrives as a
+new Dataset: DataSource follows the files and ingests appended rows
+incrementally (Dataset.with_appended), reloading only on other changes.
+"""
+
+import copy
+import threading
+import time
+
+import pandas as pd
+
+import absence
+import data_store
+import flight_risk
+import perf
+from cube import KPICube
+from filter_index import FilterIndex
+from org_tree import OrgTree
+from timeline import EventTimeline, table_events
+
+
+class Dataset:
+    """HR tables plus load-time aggregates (read-only once built)"""
+
+    def __init__(self, employees, sick_leave, recruitment, terminations, version=None):
+        self.version = version
+        self.employees = employees
+        self.sick_leave = sick_leave
+        self.recruitment = recruitment
+        self.terminations = terminations
+        self.active = active = employees['termination_date'].isna().to_numpy()
+        # Derived employee columns, so views never need a copy to add them
+        employees['band_mid'] = (employees['salary_band_min'] + employees['salary_band_max']) / 2
+        employees['compa_ratio'] = employees['salary'] / employees['band_mid']
+        # Flight risk inputs are measured at the employee table's latest date (its extract date)
+        self.as_of = employees[['hire_date', 'termination_date', 'last_promotion_date']].max().max()
+        employees['years_since_promotion'] = flight_risk.years_since_promotion(employees, self.as_of)
+        # Per-employee absence and reporting-line columns must exist before the cube is built from them
+        self.sick_monthly = absence.monthly_rollup(sick_leave)
+        absence.add_employee_rollups(employees, self.sick_monthly)
+        self.org_tree = OrgTree.build(employees)
+        employees['direct_reports'] = self.org_tree.direct_report_counts(active)
+        self.org_prefix = _org_prefix(self.org_tree, employees, active)
+        self.cube = KPICube.build(employees, recruitment, terminations)
+        self.timeline = EventTimeline.build(employees, self.sick_monthly, recruitment, terminations)
+        self.filter_index = FilterIndex(employees, data_store.FILTER_DIMENSIONS, active=active)
+        self.filter_options = _filter_options(employees, active)
+        self._memory_bytes = None
+
+    def with_appended(self, sick_leave=None, terminations=None, version=None):
+        """New Dataset with rows appended to the sick leave and termination tables
+
+        The new rows must carry their employee_row key. Only what they touch
+        is updated: their sick leave is merged into the monthly rollup, their
+        events are added to the timeline, and terminations of active employees
+        end those employments (active mask, as_of date, reporting-line sums,
+        filter index).
+        The cube is re-aggregated from the in-memory columns, since a new month
+        of sick leave moves every employee's Bradford window. Everything else,
+        self included, is shared unchanged.
+        """
+        new = copy.copy(self)
+        new.version = version
+        new._memory_bytes = None
+        # Shallow copy: columns replaced below are new arrays, the rest stay shared with self
+        new.employees = employees = self.employees.copy(deep=False)
+        sick_monthly = leavers = None
+
+        if sick_leave is not None and len(sick_leave):
+            new.sick_leave = pd.concat([self.sick_leave, sick_leave], ignore_index=True)
+            sick_monthly = absence.monthly_rollup(sick_leave)
+            new.sick_monthly = absence.merge_monthly(self.sick_monthly, sick_monthly)
+            absence.add_employee_rollups(employees, new.sick_monthly)
+
+        if terminations is not None and len(terminations):
+            new.terminations = pd.concat([self.terminations, terminations], ignore_index=True)
+            leavers = data_store.apply_terminations(employees, terminations)
+            if len(leavers):
+                # A filled-in termination date can be the table's latest date, as on a full load
+                new.as_of = employees[['hire_date', 'termination_date', 'last_promotion_date']].max().max()
+                if new.as_of != self.as_of:
+                    employees['years_since_promotion'] = flight_risk.years_since_promotion(employees, new.as_of)
+                new.active = active = self.active.copy()
+                active[leavers] = False
+                employees['direct_reports'] = self.org_tree.direct_report_counts(active)
+                new.org_prefix = _org_prefix(self.org_tree, employees, active)
+                new.filter_index = self.filter_index.with_active(active)
+                new.filter_options = _filter_options(employees, active)
+
+        new.cube = KPICube.build(employees, new.recruitment, new.terminations)
+        new.timeline = self.timeline.add_events(table_events(
+            self.timeline.categories, employees, leavers=leavers, sick_monthly=sick_monthly, terminations=terminations))
+        return new
+
+    def memory_bytes(self):
+        """Resident size of the tables and every derived structure (computed once)"""
+        if self._memory_bytes is None:
+            self._memory_bytes = perf.object_bytes(self)
+        return self._memory_bytes
+
+
+def _org_prefix(org_tree, employees, active):
+    """Subtree prefix sums over the active employees, for leader rollups"""
+    return {
+        'headcount': org_tree.prefix(active),
+        'engagement': org_tree.prefix(employees['engagement_score'].to_numpy(dtype=float) * active),
+        'high_flight_risk': org_tree.prefix((employees['flight_risk'] == 'High').to_numpy() & active),
+        'salary': org_tree.prefix(employees['salary'].to_numpy(dtype=float) * active),
+    }
+
+
+def _filter_options(employees, active):
+    """Sidebar choices: values present among the active employees"""
+    return {dim: sorted(employees.loc[active, dim].unique().tolist()) for dim in data_store.FILTER_DIMENSIONS}
+
+
+def _read_tables(data_path):
+    """(tables, file_state) - read again if a file changed while it was being read"""
+    while True:
+        state = data_store.file_state(data_path)
+        tables = data_store.load_tables(data_path)
+        if data_store.file_state(data_path) == state:
+            return tables, state
+
+
+def load_dataset(data_path):
+    """Load the tables in data_path and build the derived structures"""
+    tables, state = _read_tables(data_path)
+    return Dataset(*tables, version=data_store.state_version(state))
+
+
+class DataSource:
+    """The current Dataset for a data folder, following changes to its files
+
+    current() looks at the files at most every refresh_seconds (None = never).
+    Rows appended to the data_store.APPEND_TABLES CSVs are parsed on their own
+    and folded into a new Dataset; any other change reloads everything. The new
+    Dataset replaces the old one in a single assignment, so a rerun in progress
+    finishes on the Dataset it started with and the next rerun sees the new data.
+    """
+
+    def __init__(self, data_path, refresh_seconds=None):
+        self.data_path = data_path
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._reload()
+
+    def current(self):
+        """The latest Dataset, checking the files first when a check is due"""
+        due = self.refresh_seconds is not None and time.monotonic() - self._checked_at >= self.refresh_seconds
+        # One session checks at a time; the others carry on with the current Dataset
+        if due and self._lock.acquire(blocking=False):
+            try:
+                self.refresh()
+            finally:
+                self._lock.release()
+        return self.dataset
+
+    def refresh(self):
+        """Check the files now; returns 'unchanged', 'appended' or 'reloaded'"""
+        self._checked_at = time.monotonic()
+        state = data_store.file_state(self.data_path)
+        if state == self.state:
+            return 'unchanged'
+        appended = data_store.appended_tables(self.state, state)
+        if appended is not None:
+            try:
+                with perf.timed('ingest_appended'):
+                    return 'appended' if self._append(appended) else 'unchanged'
+            except ValueError:
+                pass  # Rows that do not parse or validate: fall back to a full reload
+        with perf.timed('load_data'):
+            self._reload()
+        return 'reloaded'
+
+    def _reload(self):
+        tables, self.state = _read_tables(self.data_path)
+        self.dataset = Dataset(*tables, version=data_store.state_version(self.state))
+        self._employee_ids = pd.Index(self.dataset.employees['employee_id'])
+        self._checked_at = time.monotonic()
+
+    def _append(self, names):
+        """Read the rows appended to the named tables and swap in the extended Dataset; returns the row count"""
+        state = dict(self.state)
+        rows = {}
+        for name in names:
+            rows[name], state[name] = data_store.read_appended_rows(name, self.state[name])
+            # Row key as in data_store.add_row_keys(); appends never change the employee table
+            rows[name]['employee_row'] = self._employee_ids.get_indexer(rows[name]['employee_id']).astype('int32')
+        added = sum(len(r) for r in rows.values())
+        if added:  # Otherwise only an incomplete last line so far
+            self.dataset = self.dataset.with_appended(version=data_store.state_version(state), **rows)
+        self.state = state
+        return added
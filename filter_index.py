@@ -0,0 +1,64 @@
+"""
+Bitmap Filter Index
+One packed bitmap per (dimension, value) over the employee rows. A filter
+selection is evaluated as OR within a dimension and AND across dimensions,
+giving a single array of row positions for the rest of the dashboard.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """Packed per-value bitmaps for the filter dimensions of a table"""
+
+    def __init__(self, df, dimensions, active=None):
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for dim in dimensions:
+            values = df[dim]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype('category')
+            codes = values.cat.codes.to_numpy()
+            self.bitmaps[dim] = {
+                value: np.packbits(codes == code)
+                for code, value in enumerate(values.cat.categories)
+            }
+        self.all_rows = np.packbits(np.ones(self.n_rows, dtype=bool))
+        self.active = np.packbits(np.asarray(active, dtype=bool)) if active is not None else self.all_rows
+
+    def _dimension_bitmap(self, dim, selected):
+        """OR of the bitmaps of every selected value in one dimension"""
+        if isinstance(selected, str):
+            selected = [selected]
+        bitmaps = self.bitmaps[dim]
+        result = np.zeros_like(self.all_rows)
+        for value in selected:
+            if value in bitmaps:
+                result |= bitmaps[value]
+        return result
+
+    def bitmap(self, selection, active_only=False):
+        """Packed bitmap of the rows matching selection (dimension -> value, list or None)"""
+        result = (self.active if active_only else self.all_rows).copy()
+        for dim, selected in selection.items():
+            if selected is None:
+                continue
+            result &= self._dimension_bitmap(dim, selected)
+        return result
+
+    def mask(self, selection, active_only=False):
+        """Boolean row mask for selection"""
+        return np.unpackbits(self.bitmap(selection, active_only), count=self.n_rows).astype(bool)
+
+    def rows(self, selection, active_only=False):
+        """Row positions matching selection, in table order"""
+        return np.flatnonzero(np.unpackbits(self.bitmap(selection, active_only), count=self.n_rows))
+
+    def with_active(self, active):
+        """Copy sharing the value bitmaps, with a new active-row mask"""
+        index = copy.copy(self)
+        index.active = np.packbits(np.asarray(active, dtype=bool))
+        return index
@@ -0,0 +1,76 @@
+"""
+Flight Risk Scoring
+The flight risk rules of generate_data.generate_employees() as one vectorized
+pass over employee columns, so the risk level can be recomputed for any
+number of rows - for example after a salary increase in the simulator.
+Replacement values broadcast, so a grid of scenarios (options x employees)
+is scored in the same pass.
+
+The generator decides "stuck" from an unrecorded time since promotion; here
+it is the time since the recorded last promotion (or hire), so recomputed
+levels match the stored flight_risk label for most but not all employees.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_store import FLIGHT_RISK_ORDER
+
+LOW_ENGAGEMENT = 6.0  # Engagement below this: 2 points
+STUCK_MIN_PERFORMANCE = 4  # High performers ...
+STUCK_MIN_TENURE_YEARS = 3  # ... with this tenure ...
+STUCK_YEARS_SINCE_PROMOTION = 2  # ... and no promotion for this long: 2 points
+UNDERPAID_COMPA_RATIO = 0.9  # Salary below this share of the band midpoint: 1 point
+HOT_MARKETS = {'Engineering': ['Norge', 'Sverige']}  # Department -> countries: 1 point
+MEDIUM_POINTS = 1
+HIGH_POINTS = 3
+
+# Employee columns points() reads
+SCORE_COLUMNS = ['engagement_score', 'performance_rating', 'tenure_years', 'years_since_promotion',
+                 'salary', 'band_mid', 'department', 'country']
+
+
+def points(employees, salary=None, engagement=None):
+    """Flight risk points per row of employees
+
+    salary / engagement replace those columns, e.g. after an intervention;
+    they may carry leading axes (scenarios x rows) and the result follows.
+    """
+    salary = employees['salary'].to_numpy(dtype=float) if salary is None else salary
+    engagement = employees['engagement_score'].to_numpy(dtype=float) if engagement is None else engagement
+    return (2 * (engagement < LOW_ENGAGEMENT)
+            + 2 * stuck(employees)
+            + 1 * (salary < UNDERPAID_COMPA_RATIO * employees['band_mid'].to_numpy(dtype=float))
+            + 1 * hot_market(employees))
+
+
+def stuck(employees):
+    """High performers with long tenure and no recent promotion"""
+    return ((employees['performance_rating'].to_numpy() >= STUCK_MIN_PERFORMANCE)
+            & (employees['tenure_years'].to_numpy() > STUCK_MIN_TENURE_YEARS)
+            & (employees['years_since_promotion'].to_numpy() > STUCK_YEARS_SINCE_PROMOTION))
+
+
+def hot_market(employees):
+    """Employees in a department and country where others are hiring away"""
+    hot = np.zeros(len(employees), dtype=bool)
+    for department, countries in HOT_MARKETS.items():
+        hot |= (employees['department'] == department).to_numpy() & employees['country'].isin(countries).to_numpy()
+    return hot
+
+
+def levels(risk_points):
+    """Position in FLIGHT_RISK_ORDER (0 = Low, 1 = Medium, 2 = High) for each points value"""
+    return (risk_points >= MEDIUM_POINTS).astype(np.int8) + (risk_points >= HIGH_POINTS)
+
+
+def rescore(employees, salary=None, engagement=None):
+    """Recomputed flight_risk labels for the rows of employees, as an ordered Categorical"""
+    codes = levels(points(employees, salary, engagement))
+    return pd.Categorical.from_codes(codes, categories=FLIGHT_RISK_ORDER, ordered=True)
+
+
+def years_since_promotion(employees, as_of):
+    """Years from the last promotion (or the hire date, if never promoted) to as_of"""
+    since = employees['last_promotion_date'].fillna(employees['hire_date'])
+    return ((as_of - since).dt.days / 365).to_numpy()
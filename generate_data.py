@@ -1,22 +1,30 @@
 """
 Synthetic HR Data Generator
 Generates realistic HR data for ~5000 employees across Nordic + Germany
-No external dependencies beyond pandas/numpy
+No external dependencies beyond pandas/numpy (and pyarrow for Parquet output)
 """
 
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import datetime
+
+from data_store import DATE_COLUMNS, DEFAULT_REPLACEMENT_MULTIPLIER, REPLACEMENT_COST_MULTIPLIER, TABLES
 
 # Set seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+SEED = 42
 
 # Configuration
 NUM_EMPLOYEES = 5200  # Including some who have left
 CURRENT_DATE = datetime(2025, 1, 15)
 START_DATE = datetime(2018, 1, 1)
+CHUNK_SIZE = 100_000  # Employees per chunk when streaming to disk
 
 # Norwegian names
 NORWEGIAN_FIRST_MALE = ['Erik', 'Lars', 'Anders', 'Magnus', 'Kristian', 'Thomas', 'Martin', 'Jonas', 'Marius', 'Henrik', 'Ola', 'Per', 'Jan', 'Bjørn', 'Knut', 'Trond', 'Geir', 'Svein', 'Håkon', 'Olav']
@@ -151,394 +159,610 @@ JOB_TITLES = {
     }
 }
 
-def weighted_choice(options_dict, key='weight'):
-    """Make a weighted random choice from a dictionary"""
-    options = list(options_dict.keys())
-    weights = [options_dict[o][key] for o in options]
-    return random.choices(options, weights=weights, k=1)[0]
-
-def generate_name(country_data, gender):
-    """Generate a random name based on country"""
-    if gender == 'M':
-        first = random.choice(country_data['first_male'])
-    else:
-        first = random.choice(country_data['first_female'])
-    last = random.choice(country_data['last'])
-    return f"{first} {last}"
-
-def generate_employees():
-    """Generate employee data"""
-    employees = []
-
-    # Track managers for org structure
-    managers_by_dept_country = {}
-
-    for i in range(NUM_EMPLOYEES):
-        emp_id = f"EMP-{str(i+1).zfill(5)}"
-
-        # Basic demographics
-        country = weighted_choice(COUNTRIES)
-        country_data = COUNTRIES[country]
-        city = random.choice(country_data['cities'])
-
-        gender = random.choices(['M', 'F', 'Other'], weights=[0.52, 0.46, 0.02])[0]
-        name = generate_name(country_data, gender if gender != 'Other' else random.choice(['M', 'F']))
-
-        # Department and role
-        department = weighted_choice(DEPARTMENTS)
-        seniority = weighted_choice(SENIORITY_LEVELS)
-
-        # Adjust gender distribution for senior roles (reflecting current reality for storyline)
-        if seniority in ['Director', 'VP', 'C-Level'] and gender == 'F':
-            if random.random() < 0.3:  # 30% chance to bump down
-                seniority = 'Lead' if seniority == 'Director' else 'Senior'
-
-        job_titles = JOB_TITLES[department][seniority]
-        job_title = random.choice(job_titles)
-
-        # Job family based on seniority
-        if seniority in ['C-Level', 'VP']:
-            job_family = 'Executive'
-        elif seniority in ['Director', 'Lead']:
-            job_family = 'Management'
-        elif 'Specialist' in job_title or 'Analyst' in job_title:
-            job_family = 'Specialist'
-        else:
-            job_family = 'Individual Contributor'
-
-        # Tenure and dates
-        min_years, max_years = SENIORITY_LEVELS[seniority]['years_exp']
-        tenure_years = max(0.1, np.random.normal((min_years + max_years) / 2, 1.5))
-        tenure_years = min(tenure_years, (CURRENT_DATE - START_DATE).days / 365)
-
-        hire_date = CURRENT_DATE - timedelta(days=int(tenure_years * 365))
-        if hire_date < START_DATE:
-            hire_date = START_DATE + timedelta(days=random.randint(0, 365))
-            tenure_years = (CURRENT_DATE - hire_date).days / 365
-
-        # Termination (some employees have left)
-        is_terminated = random.random() < 0.12  # ~12% have left
-        termination_date = None
-        if is_terminated:
-            days_employed = int(tenure_years * 365)
-            termination_date = hire_date + timedelta(days=random.randint(30, max(31, days_employed)))
-            if termination_date > CURRENT_DATE:
-                termination_date = CURRENT_DATE - timedelta(days=random.randint(1, 180))
-
-        # Salary
-        base_min, base_max = SENIORITY_LEVELS[seniority]['salary_range']
-        dept_factor = DEPARTMENTS[department]['salary_factor']
-        country_factor = country_data['currency_factor']
-
-        salary_mid = (base_min + base_max) / 2 * dept_factor * country_factor
-        salary = np.random.normal(salary_mid, salary_mid * 0.1)
-        salary = round(salary / 1000) * 1000  # Round to nearest 1000
-
-        # Salary bands
-        band_min = round(base_min * dept_factor * country_factor / 1000) * 1000
-        band_max = round(base_max * dept_factor * country_factor / 1000) * 1000
-
-        # Age
-        age_offset = SENIORITY_LEVELS[seniority]['years_exp'][0] + 22
-        age = max(22, min(65, int(np.random.normal(age_offset + 5, 5))))
-        if age < 25:
-            age_group = '<25'
-        elif age < 35:
-            age_group = '25-34'
-        elif age < 45:
-            age_group = '35-44'
-        elif age < 55:
-            age_group = '45-54'
-        else:
-            age_group = '55+'
-
-        # Performance and engagement
-        # Create some variance - Engineering in Germany has issues
-        base_performance = 3.5
-        base_engagement = 7.0
-
-        if department == 'Engineering' and country == 'Tyskland':
-            base_engagement -= 1.5  # Storyline: Engineering Germany has engagement issues
-        if department == 'Customer Support':
-            base_engagement -= 0.8  # Storyline: Support burnout
-        if department == 'Sales' and seniority == 'Junior':
-            base_performance -= 0.3  # Storyline: Sales onboarding issues
-
-        performance_rating = max(1, min(5, int(round(np.random.normal(base_performance, 0.8)))))
-        engagement_score = max(1, min(10, round(np.random.normal(base_engagement, 1.5), 1)))
-
-        # Flight risk
-        flight_risk_score = 0
-        if engagement_score < 6:
-            flight_risk_score += 2
-        if performance_rating >= 4 and tenure_years > 3:
-            # High performers stuck
-            last_promo_years = random.uniform(1, tenure_years)
-            if last_promo_years > 2:
-                flight_risk_score += 2
-        if salary < salary_mid * 0.9:
-            flight_risk_score += 1
-        if department == 'Engineering' and country in ['Norge', 'Sverige']:
-            flight_risk_score += 1  # Hot market
-
-        if flight_risk_score >= 3:
-            flight_risk = 'High'
-        elif flight_risk_score >= 1:
-            flight_risk = 'Medium'
-        else:
-            flight_risk = 'Low'
-
-        # Last promotion
-        if tenure_years > 1:
-            last_promo_days = random.randint(180, int(tenure_years * 365))
-            last_promotion_date = hire_date + timedelta(days=last_promo_days)
-            if last_promotion_date > CURRENT_DATE:
-                last_promotion_date = None
-        else:
-            last_promotion_date = None
-
-        # Internal moves
-        internal_moves = 0
-        if tenure_years > 2:
-            internal_moves = random.choices([0, 1, 2, 3], weights=[0.6, 0.25, 0.1, 0.05])[0]
-
-        # Training hours
-        training_hours = max(0, np.random.normal(35, 20))
-        if department == 'R&D':
-            training_hours += 15
-        if seniority in ['Junior', 'Mid']:
-            training_hours += 10
-
-        # Manager assignment
-        manager_id = None
-        if seniority not in ['C-Level', 'VP', 'Director']:
-            key = (department, country)
-            if key not in managers_by_dept_country:
-                managers_by_dept_country[key] = []
-            if managers_by_dept_country[key]:
-                manager_id = random.choice(managers_by_dept_country[key])
-
-        # Store potential managers
-        if seniority in ['Director', 'Lead', 'VP']:
-            key = (department, country)
-            if key not in managers_by_dept_country:
-                managers_by_dept_country[key] = []
-            managers_by_dept_country[key].append(emp_id)
-
-        employees.append({
-            'employee_id': emp_id,
-            'name': name,
-            'hire_date': hire_date.strftime('%Y-%m-%d'),
-            'termination_date': termination_date.strftime('%Y-%m-%d') if termination_date else None,
-            'department': department,
-            'country': country,
-            'location_city': city,
-            'job_family': job_family,
-            'job_title': job_title,
-            'seniority_level': seniority,
-            'manager_id': manager_id,
-            'salary': salary,
-            'salary_band_min': band_min,
-            'salary_band_max': band_max,
-            'gender': gender,
-            'age_group': age_group,
-            'tenure_years': round(tenure_years, 1),
-            'performance_rating': performance_rating,
-            'engagement_score': engagement_score,
-            'flight_risk': flight_risk,
-            'last_promotion_date': last_promotion_date.strftime('%Y-%m-%d') if last_promotion_date else None,
-            'internal_moves': internal_moves,
-            'training_hours_ytd': round(training_hours, 1)
-        })
-
-    return pd.DataFrame(employees)
-
-def generate_sick_leave(employees_df):
-    """Generate sick leave records"""
-    sick_records = []
-
-    active_employees = employees_df[employees_df['termination_date'].isna()]
-
-    for _, emp in active_employees.iterrows():
-        # Generate monthly sick leave for 2024
-        for month in range(1, 13):
-            # Base sick days
-            base_sick_days = 0.8
-
-            # Department factors
-            if emp['department'] == 'Customer Support':
-                base_sick_days += 0.5  # Higher stress
-            if emp['department'] == 'Operations':
-                base_sick_days += 0.3
-
-            # Country factors (realistic sick leave patterns)
-            if emp['country'] == 'Norge':
-                base_sick_days *= 1.3  # Higher sick leave culture
-            if emp['country'] == 'Tyskland':
-                base_sick_days *= 1.2
-
-            # Engagement correlation
-            if emp['engagement_score'] < 6:
-                base_sick_days *= 1.4
-
-            # Winter months higher
-            if month in [1, 2, 11, 12]:
-                base_sick_days *= 1.3
-
-            sick_days = max(0, np.random.exponential(base_sick_days))
-
-            if sick_days > 0:
-                sick_type = 'Long-term' if sick_days > 5 else 'Short-term'
-                sick_records.append({
-                    'employee_id': emp['employee_id'],
-                    'year': 2024,
-                    'month': month,
-                    'sick_days': round(sick_days, 1),
-                    'sick_leave_type': sick_type
-                })
-
-    return pd.DataFrame(sick_records)
-
-def generate_recruitment(employees_df):
-    """Generate recruitment data"""
-    recruitment_records = []
+def weighted_choice(rng, options_dict, size, key='weight'):
+    """Draw `size` weighted random positions into options_dict's keys"""
+    weights = np.array([option[key] for option in options_dict.values()], dtype=float)
+    return rng.choice(len(weights), size=size, p=weights / weights.sum())
+
+def choice_per_group(rng, groups, options_by_group):
+    """Uniform random pick from options_by_group[g] for every row, where g = groups[row]"""
+    catalog = np.array([option for options in options_by_group for option in options], dtype=object)
+    counts = np.array([len(options) for options in options_by_group])
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return catalog[offsets[groups] + (rng.random(len(groups)) * counts[groups]).astype(int)]
+
+def format_dates(dates):
+    """datetime64[D] array -> 'YYYY-MM-DD' strings, None where missing"""
+    unique_dates, inverse = np.unique(dates, return_inverse=True)
+    labels = np.datetime_as_string(unique_dates, unit='D').astype(object)
+    labels[np.isnat(unique_dates)] = None
+    return labels[inverse.ravel()]
+
+def employee_ids(numbers):
+    """Employee numbers -> 'EMP-00001' style IDs"""
+    return np.char.add('EMP-', np.char.zfill(np.asarray(numbers).astype(str), 5)).astype(object)
+
+def assign_managers(rng, group, is_manager, needs_manager, first_id=1, manager_pools=None):
+    """Pick each employee's manager uniformly among the managers generated before them in the same group.
+
+    "Before" is generation order (employee number), as in the original
+    generator, not hire_date: a manager can have been hired after their
+    reports. Returns employee numbers (0 = no manager). manager_pools (group -> array of
+    employee numbers) carries managers over from earlier chunks and is extended
+    in place with this chunk's managers.
+    """
+    n = len(group)
+    n_groups = len(manager_pools) if manager_pools is not None else int(group.max(initial=-1)) + 1
+    prior = manager_pools if manager_pools is not None else [np.empty(0, dtype=np.int64)] * n_groups
+    prior_counts = np.array([len(pool) for pool in prior], dtype=np.int64)
+    prior_before_group = np.concatenate([[0], np.cumsum(prior_counts)])
+    prior_flat = np.concatenate(prior).astype(np.int64)
+
+    # Sort by group (stable keeps generation order), so a group's managers are contiguous
+    order = np.argsort(group, kind='stable')
+    group_sorted = group[order]
+    manager_sorted = is_manager[order]
+    managers_before_group = np.concatenate([[0], np.cumsum(np.bincount(group, weights=is_manager, minlength=n_groups).astype(int))])
+    managers_in_order = order[manager_sorted]
+
+    # Managers from earlier chunks plus those seen earlier in this chunk, then one uniform pick among them
+    earlier = np.cumsum(manager_sorted) - manager_sorted - managers_before_group[group_sorted]
+    carried = prior_counts[group_sorted]
+    pick = (rng.random(n) * (carried + earlier)).astype(int)
+
+    manager_number = np.zeros(n, dtype=np.int64)
+    has_manager = needs_manager[order] & (carried + earlier > 0)
+    from_prior = has_manager & (pick < carried)
+    from_chunk = has_manager & ~from_prior
+    manager_number[order[from_prior]] = prior_flat[prior_before_group[group_sorted[from_prior]] + pick[from_prior]]
+    manager_number[order[from_chunk]] = first_id + managers_in_order[
+        managers_before_group[group_sorted[from_chunk]] + pick[from_chunk] - carried[from_chunk]]
+
+    if manager_pools is not None:
+        for g in np.unique(group[is_manager]):
+            chunk_managers = first_id + np.flatnonzero(is_manager & (group == g))
+            manager_pools[g] = np.concatenate([manager_pools[g], chunk_managers])
+    return manager_number
+
+def draw_org(rng, n):
+    """Draw the columns that decide manager pools: country, gender, department and seniority codes"""
+    level = {s: i for i, s in enumerate(SENIORITY_LEVELS)}
+    country = weighted_choice(rng, COUNTRIES, n)
+    gender = rng.choice(3, size=n, p=[0.52, 0.46, 0.02])  # M, F, Other
+    department = weighted_choice(rng, DEPARTMENTS, n)
+    seniority = weighted_choice(rng, SENIORITY_LEVELS, n)
+
+    # Adjust gender distribution for senior roles (reflecting current reality for storyline)
+    bump = (seniority >= level['Director']) & (gender == 1) & (rng.random(n) < 0.3)
+    seniority[bump] = np.where(seniority[bump] == level['Director'], level['Lead'], level['Senior'])
+    return {'country': country, 'gender': gender, 'department': department, 'seniority': seniority}
+
+def manager_groups(org):
+    """(group, is_manager, needs_manager) arrays for assign_managers - Directors, Leads and VPs
+    manage within their department and country"""
+    level = {s: i for i, s in enumerate(SENIORITY_LEVELS)}
+    seniority = org['seniority']
+    return (
+        org['department'] * len(COUNTRIES) + org['country'],
+        np.isin(seniority, [level['Lead'], level['Director'], level['VP']]),
+        seniority <= level['Lead'],
+    )
+
+def generate_employees(num_employees=NUM_EMPLOYEES, rng=None, first_id=1, manager_pools=None, org=None):
+    """Generate employee data, drawing every column as a whole array.
+
+    first_id and manager_pools let a large dataset be generated in chunks:
+    IDs continue from first_id and managers are drawn from every chunk so far.
+    org (from draw_org) can be drawn from a separate stream so the manager
+    pools of a chunk are known without generating the whole chunk.
+    """
+    rng = rng if rng is not None else np.random.default_rng(SEED)
+    n = num_employees
+    org = org if org is not None else draw_org(rng, n)
+    country, gender, department, seniority = (org[k] for k in ('country', 'gender', 'department', 'seniority'))
+    current = np.datetime64(CURRENT_DATE.date(), 'D')
+    start = np.datetime64(START_DATE.date(), 'D')
+
+    countries = list(COUNTRIES)
+    departments = list(DEPARTMENTS)
+    levels = list(SENIORITY_LEVELS)
+    level = {s: i for i, s in enumerate(levels)}
+
+    def per_level(values):
+        return np.array([values(SENIORITY_LEVELS[s]) for s in levels])
+
+    emp_ids = employee_ids(np.arange(first_id, first_id + n))
+
+    # Basic demographics
+    city = choice_per_group(rng, country, [COUNTRIES[c]['cities'] for c in countries])
+
+    name_gender = np.where(gender == 2, rng.integers(0, 2, size=n), gender)
+    first = choice_per_group(rng, country * 2 + name_gender,
+                             [COUNTRIES[c][key] for c in countries for key in ('first_male', 'first_female')])
+    last = choice_per_group(rng, country, [COUNTRIES[c]['last'] for c in countries])
+    name = first + ' ' + last
+
+    # Role
+    job_title = choice_per_group(rng, department * len(levels) + seniority,
+                                 [JOB_TITLES[d][s] for d in departments for s in levels])
+    specialist_titles = [t for titles in JOB_TITLES.values() for ts in titles.values() for t in ts
+                         if 'Specialist' in t or 'Analyst' in t]
+
+    # Job family based on seniority
+    job_family = np.select(
+        [seniority >= level['VP'], seniority >= level['Lead'], np.isin(job_title, specialist_titles)],
+        ['Executive', 'Management', 'Specialist'],
+        default='Individual Contributor'
+    )
+
+    # Tenure and dates
+    min_years = per_level(lambda s: s['years_exp'][0])[seniority]
+    max_years = per_level(lambda s: s['years_exp'][1])[seniority]
+    tenure_years = np.maximum(0.1, rng.normal((min_years + max_years) / 2, 1.5))
+    tenure_years = np.minimum(tenure_years, (CURRENT_DATE - START_DATE).days / 365)
+
+    hire_date = current - (tenure_years * 365).astype(int).astype('timedelta64[D]')
+    too_early = hire_date < start
+    hire_date[too_early] = start + rng.integers(0, 366, size=int(too_early.sum())).astype('timedelta64[D]')
+    tenure_years = np.where(too_early, (current - hire_date).astype(int) / 365, tenure_years)
+
+    # Termination (some employees have left)
+    is_terminated = rng.random(n) < 0.12  # ~12% have left
+    days_employed = (tenure_years * 365).astype(int)
+    termination_date = hire_date + rng.integers(30, np.maximum(31, days_employed) + 1).astype('timedelta64[D]')
+    late = termination_date > current
+    termination_date[late] = current - rng.integers(1, 181, size=int(late.sum())).astype('timedelta64[D]')
+    termination_date[~is_terminated] = np.datetime64('NaT')
+
+    # Salary
+    base_min = per_level(lambda s: s['salary_range'][0])[seniority]
+    base_max = per_level(lambda s: s['salary_range'][1])[seniority]
+    dept_factor = np.array([DEPARTMENTS[d]['salary_factor'] for d in departments])[department]
+    country_factor = np.array([COUNTRIES[c]['currency_factor'] for c in countries])[country]
+
+    salary_mid = (base_min + base_max) / 2 * dept_factor * country_factor
+    salary = (np.round(rng.normal(salary_mid, salary_mid * 0.1) / 1000) * 1000).astype(int)  # Round to nearest 1000
+
+    # Salary bands
+    band_min = (np.round(base_min * dept_factor * country_factor / 1000) * 1000).astype(int)
+    band_max = (np.round(base_max * dept_factor * country_factor / 1000) * 1000).astype(int)
+
+    # Age
+    age = np.clip(np.trunc(rng.normal(min_years + 22 + 5, 5)), 22, 65)
+    age_group = np.digitize(age, [25, 35, 45, 55])
+
+    # Performance and engagement
+    # Create some variance - Engineering in Germany has issues
+    is_dept = {d: department == i for i, d in enumerate(departments)}
+    in_country = {c: country == i for i, c in enumerate(countries)}
+    base_performance = np.full(n, 3.5)
+    base_engagement = np.full(n, 7.0)
+    base_engagement[is_dept['Engineering'] & in_country['Tyskland']] -= 1.5  # Storyline: Engineering Germany has engagement issues
+    base_engagement[is_dept['Customer Support']] -= 0.8  # Storyline: Support burnout
+    base_performance[is_dept['Sales'] & (seniority == level['Junior'])] -= 0.3  # Storyline: Sales onboarding issues
+
+    performance_rating = np.clip(np.round(rng.normal(base_performance, 0.8)), 1, 5).astype(int)
+    engagement_score = np.clip(np.round(rng.normal(base_engagement, 1.5), 1), 1, 10)
+
+    # Flight risk
+    last_promo_years = 1 + rng.random(n) * (tenure_years - 1)
+    stuck = (performance_rating >= 4) & (tenure_years > 3) & (last_promo_years > 2)  # High performers stuck
+    flight_risk_score = (
+        2 * (engagement_score < 6)
+        + 2 * stuck
+        + 1 * (salary < salary_mid * 0.9)
+        + 1 * (is_dept['Engineering'] & (in_country['Norge'] | in_country['Sverige']))  # Hot market
+    )
+    flight_risk = np.select([flight_risk_score >= 3, flight_risk_score >= 1], [2, 1], default=0)
+
+    # Last promotion
+    promoted = tenure_years > 1
+    promo_days = rng.integers(180, np.maximum(181, (tenure_years * 365).astype(int) + 1))
+    last_promotion_date = hire_date + promo_days.astype('timedelta64[D]')
+    last_promotion_date[~promoted | (last_promotion_date > current)] = np.datetime64('NaT')
+
+    # Internal moves
+    internal_moves = np.where(tenure_years > 2, rng.choice(4, size=n, p=[0.6, 0.25, 0.1, 0.05]), 0)
+
+    # Training hours
+    training_hours = np.maximum(0, rng.normal(35, 20, size=n))
+    training_hours += np.where(is_dept['R&D'], 15, 0)
+    training_hours += np.where(seniority <= level['Mid'], 10, 0)
+
+    # Manager assignment
+    group, is_manager, needs_manager = manager_groups(org)
+    manager_number = assign_managers(rng, group, is_manager, needs_manager, first_id, manager_pools)
+    manager_id = np.where(manager_number > 0, employee_ids(manager_number), None)
+
+    def labels(codes, names):
+        return pd.Categorical.from_codes(codes, categories=names)
+
+    return pd.DataFrame({
+        'employee_id': emp_ids,
+        'name': name,
+        'hire_date': format_dates(hire_date),
+        'termination_date': format_dates(termination_date),
+        'department': labels(department, departments),
+        'country': labels(country, countries),
+        'location_city': city,
+        'job_family': job_family,
+        'job_title': job_title,
+        'seniority_level': labels(seniority, levels),
+        'manager_id': manager_id,
+        'salary': salary,
+        'salary_band_min': band_min,
+        'salary_band_max': band_max,
+        'gender': labels(gender, ['M', 'F', 'Other']),
+        'age_group': labels(age_group, ['<25', '25-34', '35-44', '45-54', '55+']),
+        'tenure_years': np.round(tenure_years, 1),
+        'performance_rating': performance_rating,
+        'engagement_score': engagement_score,
+        'flight_risk': labels(flight_risk, ['Low', 'Medium', 'High']),
+        'last_promotion_date': format_dates(last_promotion_date),
+        'internal_moves': internal_moves,
+        'training_hours_ytd': np.round(training_hours, 1)
+    })
+
+def generate_sick_leave(employees_df, years=(2024,), rng=None):
+    """Generate monthly sick leave records for every month an employee was employed in years"""
+    rng = rng if rng is not None else np.random.default_rng(SEED + 1)
+
+    department = employees_df['department'].to_numpy()
+    country = employees_df['country'].to_numpy()
+
+    # Base sick days per employee, with department factors (stress), country factors
+    # (realistic sick leave patterns) and engagement correlation
+    base_sick_days = (
+        0.8
+        + 0.5 * (department == 'Customer Support')
+        + 0.3 * (department == 'Operations')
+    )
+    base_sick_days *= np.where(country == 'Norge', 1.3, 1.0)  # Higher sick leave culture
+    base_sick_days *= np.where(country == 'Tyskland', 1.2, 1.0)
+    base_sick_days *= np.where(employees_df['engagement_score'].to_numpy() < 6, 1.4, 1.0)
+
+    # Winter months higher
+    months = np.arange(1, 13)
+    season = np.where(np.isin(months, [1, 2, 11, 12]), 1.3, 1.0)
+
+    hire_date = pd.to_datetime(employees_df['hire_date']).to_numpy().astype('datetime64[D]')
+    termination_date = pd.to_datetime(employees_df['termination_date']).to_numpy().astype('datetime64[D]')
+    termination_date[np.isnat(termination_date)] = np.datetime64(CURRENT_DATE.date(), 'D')
+    employee_ids = employees_df['employee_id'].to_numpy()
+
+    frames = []
+    for year in years:
+        month_start = np.arange(f'{year}-01', f'{year + 1}-01', dtype='datetime64[M]')
+        month_end = (month_start + 1).astype('datetime64[D]') - 1
+        month_start = month_start.astype('datetime64[D]')
+
+        # (employee, month) cells where the employee was on the payroll
+        employed = (hire_date[:, None] <= month_end) & (termination_date[:, None] >= month_start)
+        emp_idx, month_idx = np.nonzero(employed)
+
+        sick_days = rng.exponential(base_sick_days[emp_idx] * season[month_idx])
+        keep = sick_days > 0
+        emp_idx, month_idx, sick_days = emp_idx[keep], month_idx[keep], sick_days[keep]
+
+        frames.append(pd.DataFrame({
+            'employee_id': employee_ids[emp_idx],
+            'year': year,
+            'month': months[month_idx],
+            'sick_days': np.round(sick_days, 1),
+            'sick_leave_type': np.where(sick_days > 5, 'Long-term', 'Short-term')
+        }))
+
+    return pd.concat(frames, ignore_index=True)
+
+def generate_recruitment(employees_df, rng=None, first_requisition=1):
+    """Generate recruitment data, one requisition per employee hired since 2022"""
+    rng = rng if rng is not None else np.random.default_rng(SEED + 2)
 
     # Get hired employees
-    hired = employees_df[employees_df['hire_date'] >= '2022-01-01']
-
-    for idx, (_, emp) in enumerate(hired.iterrows()):
-        req_id = f"REQ-{str(idx+1).zfill(5)}"
-
-        hire_date = datetime.strptime(emp['hire_date'], '%Y-%m-%d')
-
-        # Time to fill varies by role
-        base_days = 35
-        if emp['seniority_level'] in ['Senior', 'Lead']:
-            base_days = 50
-        if emp['seniority_level'] in ['Director', 'VP', 'C-Level']:
-            base_days = 75
-        if emp['department'] == 'Engineering':
-            base_days += 15  # Harder to fill
-        if emp['country'] == 'Finland':
-            base_days += 10  # Smaller talent pool
-
-        days_to_fill = max(14, int(np.random.normal(base_days, 15)))
-
-        open_date = hire_date - timedelta(days=days_to_fill)
-
-        # Candidates
-        candidates_screened = random.randint(20, 150)
-        candidates_interviewed = random.randint(3, min(15, candidates_screened))
-
-        # Source
-        if emp['internal_moves'] > 0:
-            source = 'Internal'
-        else:
-            source = random.choices(
-                ['LinkedIn', 'Referral', 'Agency', 'Job Board', 'Internal'],
-                weights=[0.35, 0.25, 0.15, 0.20, 0.05]
-            )[0]
-
-        recruitment_records.append({
-            'requisition_id': req_id,
-            'department': emp['department'],
-            'country': emp['country'],
-            'job_family': emp['job_family'],
-            'seniority_level': emp['seniority_level'],
-            'open_date': open_date.strftime('%Y-%m-%d'),
-            'close_date': hire_date.strftime('%Y-%m-%d'),
-            'days_to_fill': days_to_fill,
-            'candidates_screened': candidates_screened,
-            'candidates_interviewed': candidates_interviewed,
-            'hired_employee_id': emp['employee_id'],
-            'source': source
-        })
-
-    return pd.DataFrame(recruitment_records)
-
-def generate_terminations(employees_df):
+    hire_date = pd.to_datetime(employees_df['hire_date']).to_numpy().astype('datetime64[D]')
+    hired = employees_df[hire_date >= np.datetime64('2022-01-01')]
+    hire_date = hire_date[hire_date >= np.datetime64('2022-01-01')]
+    n = len(hired)
+    seniority = hired['seniority_level'].to_numpy()
+
+    # Time to fill varies by role
+    base_days = np.select(
+        [np.isin(seniority, ['Director', 'VP', 'C-Level']), np.isin(seniority, ['Senior', 'Lead'])],
+        [75, 50], default=35
+    )
+    base_days += 15 * (hired['department'].to_numpy() == 'Engineering')  # Harder to fill
+    base_days += 10 * (hired['country'].to_numpy() == 'Finland')  # Smaller talent pool
+    days_to_fill = np.maximum(14, np.trunc(rng.normal(base_days, 15)).astype(int))
+
+    open_date = hire_date - days_to_fill.astype('timedelta64[D]')
+
+    # Candidates
+    candidates_screened = rng.integers(20, 151, size=n)
+    candidates_interviewed = rng.integers(3, np.minimum(15, candidates_screened) + 1)
+
+    # Source
+    sources = np.array(['LinkedIn', 'Referral', 'Agency', 'Job Board', 'Internal'], dtype=object)
+    source = sources[rng.choice(len(sources), size=n, p=[0.35, 0.25, 0.15, 0.20, 0.05])]
+    source[hired['internal_moves'].to_numpy() > 0] = 'Internal'
+
+    return pd.DataFrame({
+        'requisition_id': np.char.add('REQ-', np.char.zfill(np.arange(first_requisition, first_requisition + n).astype(str), 5)).astype(object),
+        'department': hired['department'].to_numpy(),
+        'country': hired['country'].to_numpy(),
+        'job_family': hired['job_family'].to_numpy(),
+        'seniority_level': seniority,
+        'open_date': format_dates(open_date),
+        'close_date': format_dates(hire_date),
+        'days_to_fill': days_to_fill,
+        'candidates_screened': candidates_screened,
+        'candidates_interviewed': candidates_interviewed,
+        'hired_employee_id': hired['employee_id'].to_numpy(),
+        'source': source
+    })
+
+def generate_terminations(employees_df, rng=None):
     """Generate termination details"""
-    termination_records = []
+    rng = rng if rng is not None else np.random.default_rng(SEED + 3)
 
     terminated = employees_df[employees_df['termination_date'].notna()]
-
-    for _, emp in terminated.iterrows():
-        # Reason based on performance and engagement
-        if emp['performance_rating'] <= 2:
-            reason = random.choices(['Involuntary', 'Voluntary'], weights=[0.7, 0.3])[0]
-        elif emp['engagement_score'] < 5:
-            reason = 'Voluntary'
-        elif emp['tenure_years'] > 25 and emp['age_group'] == '55+':
-            reason = 'Retirement'
+    n = len(terminated)
+    performance = terminated['performance_rating'].to_numpy()
+    engagement = terminated['engagement_score'].to_numpy()
+    salary = terminated['salary'].to_numpy()
+    seniority = terminated['seniority_level'].to_numpy()
+
+    # Reason based on performance and engagement
+    reasons = np.array(['Voluntary', 'Involuntary', 'Retirement'], dtype=object)
+    low_performer = np.where(rng.random(n) < 0.7, 'Involuntary', 'Voluntary')
+    other = reasons[rng.choice(3, size=n, p=[0.75, 0.20, 0.05])]
+    reason = np.select(
+        [
+            performance <= 2,
+            engagement < 5,
+            (terminated['tenure_years'].to_numpy() > 25) & (terminated['age_group'].to_numpy() == '55+'),
+        ],
+        [low_performer, 'Voluntary', 'Retirement'],
+        default=other
+    ).astype(object)
+
+    # Exit survey (if voluntary)
+    voluntary = reason == 'Voluntary'
+    exit_score = np.where(voluntary, np.clip(np.round(rng.normal(5.5, 2, size=n), 1), 1, 10), np.nan)
+
+    # Rehire eligible
+    rehire_eligible = (reason != 'Involuntary') & (~voluntary | (exit_score > 4))
+
+    # Replacement cost (1.5-2x salary for most, more for senior)
+    multiplier = pd.Series(seniority).map(REPLACEMENT_COST_MULTIPLIER).fillna(DEFAULT_REPLACEMENT_MULTIPLIER).to_numpy()
+
+    return pd.DataFrame({
+        'employee_id': terminated['employee_id'].to_numpy(),
+        'termination_date': terminated['termination_date'].to_numpy(),
+        'termination_reason': reason,
+        'exit_survey_score': exit_score,
+        'rehire_eligible': rehire_eligible,
+        'last_salary': salary,
+        'tenure_at_exit': terminated['tenure_years'].to_numpy(),
+        'replacement_cost': np.round(salary * multiplier, 0)
+    })
+
+def chunk_bounds(num_employees, chunk_size, chunk):
+    """(first employee number, size) of one chunk"""
+    first_id = chunk * chunk_size + 1
+    return first_id, min(chunk_size, num_employees + 1 - first_id)
+
+def chunk_rngs(seed, chunk):
+    """Independent (org, detail) generators for one chunk, derived from the dataset seed.
+
+    Every chunk has its own streams, so the output does not depend on which
+    process generates it or in what order.
+    """
+    return tuple(np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk, stream)))
+                 for stream in range(2))
+
+def empty_manager_pools():
+    return [np.empty(0, dtype=np.int64) for _ in range(len(DEPARTMENTS) * len(COUNTRIES))]
+
+def chunk_managers(num_employees, chunk_size, seed, chunk):
+    """Employee numbers of a chunk's managers per department/country group"""
+    first_id, size = chunk_bounds(num_employees, chunk_size, chunk)
+    group, is_manager, _ = manager_groups(draw_org(chunk_rngs(seed, chunk)[0], size))
+    return [first_id + np.flatnonzero(is_manager & (group == g)) for g in range(len(DEPARTMENTS) * len(COUNTRIES))]
+
+def generate_chunks(num_employees=NUM_EMPLOYEES, chunk_size=CHUNK_SIZE, seed=SEED, years=(2024,),
+                    chunks=None, manager_pools=None):
+    """Yield (employees, sick_leave, recruitment, terminations) for consecutive blocks of employees.
+
+    chunks restricts generation to a range of chunk numbers; manager_pools must
+    then hold the managers of every earlier chunk.
+    """
+    chunks = chunks if chunks is not None else range(-(-num_employees // chunk_size))
+    manager_pools = manager_pools if manager_pools is not None else empty_manager_pools()
+    next_requisition = 1
+
+    for chunk in chunks:
+        first_id, size = chunk_bounds(num_employees, chunk_size, chunk)
+        org_rng, rng = chunk_rngs(seed, chunk)
+        employees_df = generate_employees(size, rng, first_id, manager_pools, org=draw_org(org_rng, size))
+        recruitment_df = generate_recruitment(employees_df, rng, first_requisition=next_requisition)
+        next_requisition += len(recruitment_df)
+        yield (
+            employees_df,
+            generate_sick_leave(employees_df, years, rng),
+            recruitment_df,
+            generate_terminations(employees_df, rng),
+        )
+
+class TableWriter:
+    """Appends DataFrame chunks to one CSV or Parquet file"""
+
+    def __init__(self, path, file_format):
+        self.path = path
+        self.file_format = file_format
+        self.rows = 0
+        self._parquet = None
+
+    def write(self, df):
+        if self.file_format == 'parquet':
+            self.write_arrow(pa.Table.from_pandas(df, preserve_index=False))
         else:
-            reason = random.choices(['Voluntary', 'Involuntary', 'Retirement'],
-                                   weights=[0.75, 0.20, 0.05])[0]
-
-        # Exit survey (if voluntary)
-        exit_score = None
-        if reason == 'Voluntary':
-            exit_score = round(np.random.normal(5.5, 2), 1)
-            exit_score = max(1, min(10, exit_score))
-
-        # Rehire eligible
-        rehire_eligible = reason != 'Involuntary' and (exit_score is None or exit_score > 4)
-
-        # Replacement cost (1.5-2x salary for most, more for senior)
-        multiplier = 1.5
-        if emp['seniority_level'] in ['Senior', 'Lead']:
-            multiplier = 2.0
-        if emp['seniority_level'] in ['Director', 'VP', 'C-Level']:
-            multiplier = 2.5
-
-        replacement_cost = emp['salary'] * multiplier
-
-        termination_records.append({
-            'employee_id': emp['employee_id'],
-            'termination_date': emp['termination_date'],
-            'termination_reason': reason,
-            'exit_survey_score': exit_score,
-            'rehire_eligible': rehire_eligible,
-            'last_salary': emp['salary'],
-            'tenure_at_exit': emp['tenure_years'],
-            'replacement_cost': round(replacement_cost, 0)
-        })
-
-    return pd.DataFrame(termination_records)
+            df.to_csv(self.path, mode='w' if self.rows == 0 else 'a', header=self.rows == 0, index=False)
+            self.rows += len(df)
+
+    def write_arrow(self, table):
+        if self._parquet is None:
+            # Plain string types, so part files read back for merging keep the same schema
+            schema = pa.schema([
+                field.with_type(pa.dictionary(field.type.index_type, pa.string()))
+                if pa.types.is_dictionary(field.type) and pa.types.is_large_string(field.type.value_type)
+                else field.with_type(pa.string()) if pa.types.is_large_string(field.type) else field
+                for field in table.schema
+            ], metadata=table.schema.metadata)
+            self._parquet = pq.ParquetWriter(self.path, schema, compression='zstd', use_dictionary=True)
+        self._parquet.write_table(table.cast(self._parquet.schema))
+        self.rows += table.num_rows
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+def table_path(output_dir, name, file_format):
+    return os.path.join(output_dir, f"{name}.{'parquet' if file_format == 'parquet' else 'csv'}")
+
+def write_chunks(output_dir, chunks, file_format='csv'):
+    """Stream generated chunks to one file per table in output_dir.
+
+    Returns record counts per table and active employees per country/department.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    writers = {name: TableWriter(table_path(output_dir, name, file_format), file_format) for name in TABLES}
+    active_countries = pd.Series(dtype=int)
+    active_departments = pd.Series(dtype=int)
+
+    try:
+        for chunk in chunks:
+            for name, df in zip(TABLES, chunk):
+                if file_format == 'parquet':
+                    for col in DATE_COLUMNS[name]:
+                        df[col] = pd.to_datetime(df[col], format='%Y-%m-%d')
+                writers[name].write(df)
+
+            active = chunk[0][chunk[0]['termination_date'].isna()]
+            active_countries = active_countries.add(active['country'].value_counts(), fill_value=0)
+            active_departments = active_departments.add(active['department'].value_counts(), fill_value=0)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    counts = {name: writer.rows for name, writer in writers.items()}
+    return counts, active_countries, active_departments
+
+def write_shard(output_dir, num_employees, chunk_size, file_format, seed, years, chunks, manager_pools):
+    """Process pool task: write the part files for one contiguous range of chunks"""
+    return write_chunks(output_dir, generate_chunks(num_employees, chunk_size, seed, years, chunks, manager_pools),
+                        file_format)
+
+def merge_parts(part_paths, path, file_format, renumber_requisitions=False):
+    """Concatenate shard part files in order; requisition IDs are renumbered to run across shards"""
+    next_requisition = 1
+    if file_format == 'parquet':
+        writer = TableWriter(path, file_format)
+        try:
+            for part in part_paths:
+                part_file = pq.ParquetFile(part)
+                for row_group in range(part_file.num_row_groups):
+                    table = part_file.read_row_group(row_group)
+                    if renumber_requisitions:
+                        ids = np.char.add('REQ-', np.char.zfill(
+                            np.arange(next_requisition, next_requisition + table.num_rows).astype(str), 5))
+                        table = table.set_column(0, table.schema.field(0), pa.array(ids.astype(object), table.schema.field(0).type))
+                        next_requisition += table.num_rows
+                    writer.write_arrow(table)
+        finally:
+            writer.close()
+        return
+
+    with open(path, 'w', encoding='utf-8', newline='') as out:
+        for i, part in enumerate(part_paths):
+            with open(part, encoding='utf-8', newline='') as f:
+                header = f.readline()
+                if i == 0:
+                    out.write(header)
+                for line in f:
+                    if renumber_requisitions:
+                        line = f"REQ-{next_requisition:05d},{line.split(',', 1)[1]}"
+                        next_requisition += 1
+                    out.write(line)
+
+def write_dataset(output_dir, num_employees=NUM_EMPLOYEES, chunk_size=CHUNK_SIZE, file_format='csv',
+                  seed=SEED, years=(2024,), shards=1):
+    """Generate the four tables chunk by chunk and stream them to output_dir.
+
+    Peak memory is bounded by chunk_size (plus the manager pools), not by
+    num_employees. Parquet files store dates as timestamps, like data_store.py.
+    With shards > 1 the chunks are split into contiguous ranges generated by a
+    process pool and merged in order; the files are identical to shards=1.
+    Returns record counts per table and active employees per country/department.
+    """
+    n_chunks = -(-num_employees // chunk_size)
+    shard_chunks = [range(c[0], c[-1] + 1) for c in np.array_split(np.arange(n_chunks), shards) if len(c)]
+    if len(shard_chunks) <= 1:
+        counts, countries, departments = write_chunks(
+            output_dir, generate_chunks(num_employees, chunk_size, seed, years), file_format)
+        return counts, countries.astype(int), departments.astype(int)
+
+    parts_dir = os.path.join(output_dir, '.parts')
+    with ProcessPoolExecutor(max_workers=len(shard_chunks)) as pool:
+        # Phase 1: manager pools only depend on each chunk's org stream
+        managers = list(pool.map(chunk_managers, *zip(*[(num_employees, chunk_size, seed, c) for c in range(n_chunks)])))
+
+        # Phase 2: each shard starts from the managers of every chunk before it
+        futures = []
+        for i, chunks in enumerate(shard_chunks):
+            pools = [np.concatenate([managers[c][g] for c in range(chunks[0])] or [np.empty(0, dtype=np.int64)])
+                     for g in range(len(managers[0]))]
+            futures.append(pool.submit(write_shard, os.path.join(parts_dir, f'shard-{i:04d}'), num_employees,
+                                       chunk_size, file_format, seed, years, chunks, pools))
+        results = [f.result() for f in futures]
+
+    for name in TABLES:
+        part_paths = [table_path(os.path.join(parts_dir, f'shard-{i:04d}'), name, file_format)
+                      for i in range(len(shard_chunks))]
+        merge_parts(part_paths, table_path(output_dir, name, file_format), file_format,
+                    renumber_requisitions=name == 'recruitment')
+    shutil.rmtree(parts_dir)
+
+    counts = {name: sum(r[0][name] for r in results) for name in TABLES}
+    countries = pd.concat([r[1] for r in results]).groupby(level=0).sum()
+    departments = pd.concat([r[2] for r in results]).groupby(level=0).sum()
+    return counts, countries.astype(int), departments.astype(int)
 
 if __name__ == "__main__":
-    print("Generating synthetic HR data...")
-
-    # Generate all datasets
-    print("1. Generating employees...")
-    employees_df = generate_employees()
-
-    print("2. Generating sick leave records...")
-    sick_leave_df = generate_sick_leave(employees_df)
+    parser = argparse.ArgumentParser(description="Generate synthetic HR data")
+    parser.add_argument('--employees', type=int, default=NUM_EMPLOYEES, help="Number of employees (including leavers)")
+    parser.add_argument('--output-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help="Employees generated and written per chunk (bounds peak memory)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--years', type=int, nargs='+', default=[2024], help="Years of sick leave history")
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--shards', type=int, default=1,
+                        help="Worker processes; the output for a given seed does not depend on it")
+    args = parser.parse_args()
 
-    print("3. Generating recruitment data...")
-    recruitment_df = generate_recruitment(employees_df)
-
-    print("4. Generating termination records...")
-    terminations_df = generate_terminations(employees_df)
-
-    # Save to CSV
-    output_dir = '/sessions/optimistic-nifty-knuth/mnt/Claude Coding/hr-analytics-dashboard/data'
-    import os
-    os.makedirs(output_dir, exist_ok=True)
-
-    employees_df.to_csv(f'{output_dir}/employees.csv', index=False)
-    sick_leave_df.to_csv(f'{output_dir}/sick_leave.csv', index=False)
-    recruitment_df.to_csv(f'{output_dir}/recruitment.csv', index=False)
-    terminations_df.to_csv(f'{output_dir}/terminations.csv', index=False)
+    print("Generating synthetic HR data...")
+    start = time.perf_counter()
+    counts, active_countries, active_departments = write_dataset(
+        args.output_dir, args.employees, args.chunk_size, args.format, args.seed, args.years, args.shards
+    )
 
-    print(f"\nData generation complete!")
-    print(f"- Employees: {len(employees_df)} records")
-    print(f"- Sick leave: {len(sick_leave_df)} records")
-    print(f"- Recruitment: {len(recruitment_df)} records")
-    print(f"- Terminations: {len(terminations_df)} records")
+    print(f"\nData generation complete in {time.perf_counter() - start:.1f}s ({args.output_dir})")
+    print(f"- Employees: {counts['employees']} records")
+    print(f"- Sick leave: {counts['sick_leave']} records")
+    print(f"- Recruitment: {counts['recruitment']} records")
+    print(f"- Terminations: {counts['terminations']} records")
 
     # Summary stats
-    active = employees_df[employees_df['termination_date'].isna()]
-    print(f"\nActive employees: {len(active)}")
-    print(f"Countries: {active['country'].value_counts().to_dict()}")
-    print(f"Departments: {active['department'].value_counts().to_dict()}")
+    print(f"\nActive employees: {active_countries.sum()}")
+    print(f"Countries: {active_countries.sort_values(ascending=False).to_dict()}")
+    print(f"Departments: {active_departments.sort_values(ascending=False).to_dict()}")
@@ -0,0 +1,1249 @@
+"""
+HR Analytics Engine
+Everything the dashboard computes - KPIs, red flags and their explanations,
+the tab aggregations, the what-if simulator and the chat answers - as plain
+functions of a Dataset and a FilterSpec. No Streamlit imports, so results can
+be precomputed offline, benchmarked in isolation or served by another front
+end. Outputs are numbers, dicts and DataFrames; charts are described as
+plotly.express call specs that the front end renders.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import flight_risk
+import segments
+from absence import BRADFORD_THRESHOLD
+from cube import WORKING_DAYS_PER_YEAR, _ratio, kpis_from_totals
+from timeline import kpis_from_window, monthly_turnover
+
+ALL = 'Alle'  # Sidebar value meaning "no filter"
+
+MANAGEMENT_FAMILIES = ['Management', 'Executive']
+LEADERSHIP_LEVELS = ['Director', 'VP', 'C-Level']
+
+EXAMPLE_QUESTIONS = [
+    "Hvor har vi størst lønnsavvik?",
+    "Hvilken avdeling har høyest turnover?",
+    "Hvordan er engasjementet per avdeling?",
+    "Hvor er sykefraværet høyest?",
+    "Hvordan er kjønnsfordelingen i ledelsen?",
+    "Hvilke ansatte har høyest flight risk?",
+    "Hvor lang er rekrutteringstiden?",
+]
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """Sidebar filter state; None means all values"""
+    country: str = None
+    department: str = None
+    seniority_level: str = None
+    job_family: str = None
+    date_range: tuple = None
+
+    @classmethod
+    def from_widgets(cls, country, department, seniority_level, job_family, date_range=None):
+        """Build a spec from sidebar values, where 'Alle' means no filter"""
+        values = [None if v == ALL else v for v in (country, department, seniority_level, job_family)]
+        # While a range is being picked the widget returns only the start date
+        if date_range is not None and len(date_range) != 2:
+            date_range = None
+        return cls(*values, date_range=tuple(date_range) if date_range is not None else None)
+
+    def selection(self):
+        """dimension -> value mapping for the filter index and the KPI cube"""
+        return {dim: getattr(self, dim) for dim in data_store.FILTER_DIMENSIONS}
+
+    def period(self):
+        """(start, end) Timestamps of the date range, (None, None) when unset"""
+        if self.date_range is None:
+            return None, None
+        return tuple(pd.Timestamp(d) for d in self.date_range)
+
+    def key(self):
+        return (self.country, self.department, self.seniority_level, self.job_family, self.date_range)
+
+
+def chart(kind, data, title, **kwargs):
+    """Chart spec: plotly.express.<kind>(data, title=title, **kwargs), plus optional reference lines"""
+    lines = {name: kwargs.pop(name) for name in ('vline', 'hline') if name in kwargs}
+    return {'kind': kind, 'data': data, 'kwargs': dict(title=title, **kwargs), **lines}
+
+
+# =====================
+# FILTERING & KPIs
+# =====================
+def filtered_rows(dataset, spec):
+    """Row positions of the active employees matching the filters (bitmap index lookup)"""
+    return dataset.filter_index.rows(spec.selection(), active_only=True)
+
+
+def filtered_active(dataset, spec, columns=None, rows=None):
+    """Active employees matching the filters, gathering only the given columns
+
+    Only len(rows) x len(columns) values are copied out of the shared employee
+    table; derived columns (compa_ratio, absence, direct reports) already
+    live on it, so callers never need to copy a view to add one.
+    """
+    rows = filtered_rows(dataset, spec) if rows is None else rows
+    employees = dataset.employees
+    if columns is None:
+        return employees.iloc[rows]
+    return employees.iloc[rows, employees.columns.get_indexer(columns)]
+
+
+def rows_where(dataset, rows, column, value):
+    """The rows whose categorical employee column equals value, compared on the integer codes"""
+    values = dataset.employees[column]
+    categories = values.cat.categories
+    if value not in categories:
+        return rows[:0]
+    return rows[values.cat.codes.to_numpy()[rows] == categories.get_loc(value)]
+
+
+def calculate_kpis(dataset, spec):
+    """Calculate all KPIs for the filters from the pre-aggregated cube and the event timeline
+
+    Headcount, turnover, attrition cost, time to hire and sick leave cover the
+    selected date range; the remaining KPIs describe the current workforce.
+    """
+    kpis = kpis_from_totals(dataset.cube.totals(spec.selection()))
+    kpis.update(kpis_from_window(dataset.timeline.window(spec.selection(), *spec.period())))
+    return kpis
+
+
+# =====================
+# RED FLAGS
+# =====================
+# Every red flag rule: the KPI, how it is compared with its threshold, an optional
+# guard (KPI that must exceed a minimum), and how the flag is presented. The same
+# table drives detect_red_flags() for the selected filters and scan_segments()
+# for every segment of the organisation.
+RED_FLAG_RULES = [
+    {'kpi': 'turnover_rate', 'op': '>', 'threshold': 15, 'type': 'danger', 'title': 'Høy turnover',
+     'message': "Turnover på {value:.1f}% overstiger benchmark på 15%", 'metric': 'turnover_rate', 'explanation': 'turnover'},
+    {'kpi': 'avg_engagement', 'op': '<', 'threshold': 6.5, 'type': 'danger', 'title': 'Lav engasjement',
+     'message': "Gjennomsnittlig engasjement på {value:.1f} er under målet på 6.5", 'metric': 'engagement', 'explanation': 'engagement'},
+    {'kpi': 'flight_risk_pct', 'op': '>', 'threshold': 20, 'type': 'danger', 'title': 'Høy flight risk',
+     'message': "{value:.1f}% av ansatte har høy risiko for å slutte", 'metric': 'flight_risk', 'explanation': 'flight_risk'},
+    {'kpi': 'avg_time_to_hire', 'op': '>', 'threshold': 50, 'type': 'warning', 'title': 'Lang rekrutteringstid',
+     'message': "Gjennomsnittlig {value:.0f} dager for å fylle stillinger", 'metric': 'time_to_hire', 'explanation': 'time_to_hire'},
+    {'kpi': 'sick_leave_rate', 'op': '>', 'threshold': 5, 'type': 'warning', 'title': 'Høyt sykefravær',
+     'message': "Sykefraværsrate på {value:.1f}% er over benchmark på 5%", 'metric': 'sick_leave', 'explanation': 'sick_leave'},
+    # Frequent short absences: average Bradford Factor above the trigger for monthly data
+    {'kpi': 'avg_bradford', 'op': '>', 'threshold': BRADFORD_THRESHOLD, 'guard': ('headcount', 0), 'type': 'warning',
+     'title': 'Hyppig korttidsfravær',
+     'message': f"Gjennomsnittlig Bradford-faktor på {{value:.0f}} er over terskelen på {BRADFORD_THRESHOLD:.0f}",
+     'metric': 'bradford', 'explanation': 'bradford'},
+    {'kpi': 'avg_compa_ratio', 'op': '<', 'threshold': 0.90, 'type': 'warning', 'title': 'Lønnsavvik',
+     'message': "Compa-ratio på {value:.2f} - ansatte er under markedslønn", 'metric': 'compa_ratio', 'explanation': 'salary'},
+    {'kpi': 'avg_compa_ratio', 'op': '>', 'threshold': 1.10, 'type': 'warning', 'title': 'Lønnsavvik',
+     'message': "Compa-ratio på {value:.2f} - ansatte er over markedslønn", 'metric': 'compa_ratio', 'explanation': 'salary'},
+    # Gender imbalance in leadership
+    {'kpi': 'female_management_pct', 'op': '<', 'threshold': 30, 'guard': ('management_headcount', 10), 'type': 'warning',
+     'title': 'Diversity gap', 'message': "Kun {value:.0f}% kvinner i ledelsen (mål: minimum 40%)",
+     'metric': 'diversity', 'explanation': 'diversity'},
+    {'kpi': 'span_of_control', 'op': '>', 'threshold': 10, 'type': 'warning', 'title': 'Bred span of control',
+     'message': "Gjennomsnittlig {value:.1f} ansatte per leder (anbefalt: <10)", 'metric': 'span_of_control',
+     'explanation': 'span_of_control'},
+    {'kpi': 'internal_mobility', 'op': '<', 'threshold': 8, 'type': 'info', 'title': 'Lav intern mobilitet',
+     'message': "Kun {value:.1f}% har hatt interne bytter (benchmark: 10%)", 'metric': 'mobility', 'explanation': 'mobility'},
+]
+
+COMPARISONS = {'>': np.greater, '<': np.less}
+SEVERITY_ORDER = {'danger': 0, 'warning': 1, 'info': 2}
+
+# Segments smaller than this are left out of the scan; their rates are mostly noise
+SCAN_MIN_HEADCOUNT = 20
+
+# Peer comparison: every country x department segment (one seniority level / job
+# family, or all) against the same department in the other countries and the same
+# country in the other departments, with robust z-scores (median / MAD)
+PEER_DIMENSIONS = ['country', 'department']
+PEER_Z_WARNING = 3.5  # |z| that raises a flag
+PEER_Z_DANGER = 5.0
+PEER_SHRINKAGE = 20  # Weight of the peer median when shrinking a segment, in sample units (employees)
+PEER_MIN_HEADCOUNT = 10  # Smaller segments are neither scored nor used as peers
+PEER_MIN_PEERS = 3
+MAD_TO_STD = 1.4826  # MAD of a normal distribution -> standard deviation
+# The spread is floored by the sampling error a segment of its size would show
+# if its true value were the peer median, so one event in a small segment cannot
+# pass for an outlier when the peers happen to agree closely:
+# event rates per sample unit and year are Poisson (exposure per unit and year),
+PEER_POISSON = {'turnover_rate': 1, 'sick_leave_rate': WORKING_DAYS_PER_YEAR}
+# shares of the sample in % are binomial (both with at least one event's worth of variance),
+PEER_BINOMIAL = ['flight_risk_pct', 'internal_mobility', 'female_management_pct']
+# and means use the per-employee coefficient of variation in the data
+PEER_UNIT_CV = {'avg_engagement': 0.22, 'avg_compa_ratio': 0.10, 'avg_bradford': 1.1,
+                'span_of_control': 0.85, 'avg_time_to_hire': 0.40}
+# Sample size behind each KPI, for the shrinkage (default: headcount)
+PEER_SAMPLE = {'turnover_rate': 'avg_headcount', 'female_management_pct': 'management_headcount',
+               'span_of_control': 'people_managers'}
+PEER_VALUE_FORMAT = {'avg_compa_ratio': '{:.2f}', 'avg_bradford': '{:.0f}'}  # Default: one decimal
+
+
+def rule_hits(rule, kpis):
+    """Whether the rule fires; elementwise when the KPIs are arrays of segments"""
+    return COMPARISONS[rule['op']](kpis[rule['kpi']], rule['threshold']) & rule_applies(rule, kpis)
+
+
+def rule_applies(rule, kpis):
+    """Whether the rule's guard KPI (if any) exceeds its minimum"""
+    if 'guard' not in rule:
+        return True
+    guard_kpi, minimum = rule['guard']
+    return kpis[guard_kpi] > minimum
+
+
+def rule_severity(rule, value):
+    """How far value lies past the rule's threshold, relative to the threshold"""
+    excess = value - rule['threshold'] if rule['op'] == '>' else rule['threshold'] - value
+    return excess / rule['threshold']
+
+
+def detect_red_flags(kpis):
+    """Detect anomalies and red flags"""
+    flags = []
+    for rule in RED_FLAG_RULES:
+        if rule_hits(rule, kpis):
+            value = kpis[rule['kpi']]
+            flags.append({
+                'type': rule['type'],
+                'title': rule['title'],
+                'message': rule['message'].format(value=value),
+                'metric': rule['metric'],
+                'value': value,
+                'explanation': generate_explanation(rule['explanation'], kpis)
+            })
+    return flags
+
+
+def _widest_segments(flagged, rule_columns):
+    """flagged without the segments that repeat a wider segment's flag for the same employees
+
+    A segment holds the same employees as a wider one when the wider one has
+    no others (e.g. every Senior is an Individual Contributor); rows carry
+    their segments.member_keys() id in '_members', and the widest one is kept.
+    """
+    open_slots = (flagged[data_store.FILTER_DIMENSIONS] == ALL).sum(axis=1).to_numpy()
+    return flagged.iloc[np.argsort(-open_slots, kind='stable')].drop_duplicates(rule_columns + ['_members'])
+
+
+def scan_segments(dataset, start=None, end=None, min_headcount=SCAN_MIN_HEADCOUNT):
+    """Every red flag rule checked for every segment of the organisation, ranked
+
+    Segments are all country x department x seniority x job family
+    combinations, each dimension either one value or ALL (the whole
+    organisation itself is left out - the sidebar flags already cover it).
+    KPIs come from one pass over the summed cube and timeline grids
+    (segments.py), and each rule is one array comparison. Returns
+    one row per flagged segment and rule, most severe first: danger before
+    warning before info, then by severity x affected headcount.
+    """
+    kpis = segments.segment_kpis(segments.segment_totals(dataset, start, end))
+    labels = segments.segment_labels(dataset.cube.categories, ALL)
+    members = segments.member_keys(dataset)
+    headcount = kpis['headcount']
+    eligible = headcount >= min_headcount
+    eligible[(-1,) * len(data_store.FILTER_DIMENSIONS)] = False
+
+    found = []
+    for rule in RED_FLAG_RULES:
+        index = np.nonzero(rule_hits(rule, kpis) & eligible)
+        value = kpis[rule['kpi']][index]
+        found.append(pd.DataFrame({
+            **{dim: np.asarray(labels[dim], dtype=object)[index[i]] for i, dim in enumerate(data_store.FILTER_DIMENSIONS)},
+            'type': rule['type'],
+            'title': rule['title'],
+            'metric': rule['metric'],
+            'value': value,
+            'threshold': rule['threshold'],
+            'severity': rule_severity(rule, value),
+            'headcount': headcount[index].astype(int),
+            '_members': members[index],
+        }))
+    flagged = pd.concat(found, ignore_index=True)
+
+    flagged = _widest_segments(flagged, ['title', 'metric'])
+
+    flagged['impact'] = flagged['severity'] * flagged['headcount']
+    flagged['_order'] = flagged['type'].map(SEVERITY_ORDER)
+    return (flagged.sort_values(['_order', 'impact'], ascending=[True, False], kind='stable')
+            .drop(columns=['_members', '_order']).reset_index(drop=True))
+
+
+def sampling_error(names, median, samples, years):
+    """Standard error of each KPI (last axis, one per name) measured on samples units over years
+
+    Evaluated at median, the value the segment would have if it were like
+    its peers; see PEER_POISSON, PEER_BINOMIAL and PEER_UNIT_CV.
+    """
+    error = np.zeros(np.shape(median))
+    for k, name in enumerate(names):
+        m, n = median[..., k], samples[..., k]
+        if name in PEER_POISSON:
+            exposure = n * PEER_POISSON[name] * years
+            error[..., k] = _ratio(np.sqrt(np.maximum(m / 100 * exposure, 1)), exposure, 100)
+        elif name in PEER_BINOMIAL:
+            p = np.clip(m / 100, 0, 1)
+            error[..., k] = _ratio(np.sqrt(np.maximum(n * p * (1 - p), 1)), n, 100)
+        else:
+            error[..., k] = _ratio(PEER_UNIT_CV[name] * np.abs(m), np.sqrt(n))
+    return error
+
+
+def peer_z_scores(names, values, samples, peers, years):
+    """(z, median, scale) of segment values against their peers (NaN = no peer) on a trailing axis
+
+    values and samples are segment x KPI arrays with the KPIs named by names.
+    """
+    median = np.nanmedian(peers, axis=-1)
+    spread = MAD_TO_STD * np.nanmedian(np.abs(peers - median[..., None]), axis=-1)
+    scale = np.maximum(spread, sampling_error(names, median, samples, years))
+    shrunk = (samples * values + PEER_SHRINKAGE * median) / (samples + PEER_SHRINKAGE)
+    return _ratio(shrunk - median, scale), median, scale
+
+
+def peer_anomalies(dataset, start=None, end=None):
+    """The red flag KPIs of every segment judged against its peers instead of fixed thresholds
+
+    Each segment's KPI is first shrunk toward the peer median by its sample
+    size, (n * value + PEER_SHRINKAGE * median) / (n + PEER_SHRINKAGE), so
+    small segments need a larger gap to stand out. The robust z-score is the
+    shrunk gap over the peers' spread (MAD scaled to a standard deviation),
+    floored by the segment's own sampling error (sampling_error()).
+    A flag is raised when it exceeds PEER_Z_WARNING in the direction the
+    RED_FLAG_RULES entry for that KPI treats as bad. All segments and KPIs
+    are scored in one array pass over the segments.py grid. Returns
+    flags in the detect_red_flags() structure plus the segment, z_score,
+    peer_median and headcount, strongest deviation first.
+    """
+    totals = segments.segment_totals(dataset, start, end)
+    kpis = segments.segment_kpis(totals)
+    labels = segments.segment_labels(dataset.cube.categories, ALL)
+    axes = [data_store.FILTER_DIMENSIONS.index(dim) for dim in PEER_DIMENSIONS]
+    names = list(dict.fromkeys(rule['kpi'] for rule in RED_FLAG_RULES))
+
+    # Segment x KPI arrays, with the peers of every segment on a trailing axis
+    values, peers = segments.peer_values(np.stack([kpis[k] for k in names], axis=-1), axes)
+    samples, peer_samples = segments.peer_values(
+        np.stack([kpis[PEER_SAMPLE.get(k, 'headcount')] for k in names], axis=-1), axes)
+    _, peer_headcount = segments.peer_values(kpis['headcount'][..., None], axes)
+    valid = (peer_headcount >= PEER_MIN_HEADCOUNT) & (peer_samples > 0)
+    enough = valid.sum(axis=-1) >= PEER_MIN_PEERS
+    peers = np.where(valid & enough[..., None], peers, np.nan)
+    peers[~enough] = 0  # Not scored; keeps nanmedian off all-NaN rows
+
+    z, median, scale = peer_z_scores(names, values, samples, peers, totals[1]['months'] / 12)
+    large = segments.concrete(kpis['headcount'], axes) >= PEER_MIN_HEADCOUNT
+    scored = enough & (samples > 0) & (scale > 0) & large[..., None]
+
+    own = {name: segments.concrete(array, axes) for name, array in kpis.items()}
+    members = segments.member_keys(dataset)  # Concrete positions index the full grid the same way
+    found = []
+    for rule in RED_FLAG_RULES:
+        k = names.index(rule['kpi'])
+        bad = z[..., k] if rule['op'] == '>' else -z[..., k]
+        index = np.nonzero((bad >= PEER_Z_WARNING) & scored[..., k] & rule_applies(rule, own))
+        found.append(pd.DataFrame({
+            'position': list(zip(*index)),
+            **{dim: np.asarray(labels[dim][:len(labels[dim]) - (i in axes)], dtype=object)[index[i]]
+               for i, dim in enumerate(data_store.FILTER_DIMENSIONS)},
+            'rule': RED_FLAG_RULES.index(rule),
+            'value': values[..., k][index],
+            'peer_median': median[..., k][index],
+            'z_score': z[..., k][index],
+            'headcount': own['headcount'][index].astype(int),
+            '_members': members[index],
+        }))
+    flagged = pd.concat(found, ignore_index=True)
+
+    flagged = _widest_segments(flagged, ['rule'])
+    flagged = flagged.iloc[np.argsort(-flagged['z_score'].abs().to_numpy(), kind='stable')]
+
+    flags = []
+    for row in flagged.itertuples(index=False):
+        rule = RED_FLAG_RULES[row.rule]
+        segment = {dim: getattr(row, dim) for dim in data_store.FILTER_DIMENSIONS}
+        value_format = PEER_VALUE_FORMAT.get(rule['kpi'], '{:.1f}')
+        flags.append({
+            'type': 'danger' if abs(row.z_score) >= PEER_Z_DANGER else 'warning',
+            'title': f"{rule['title']}: " + " / ".join(v for v in segment.values() if v != ALL),
+            'message': (f"{value_format.format(row.value)} mot {value_format.format(row.peer_median)} i "
+                        f"sammenlignbare segmenter ({row.z_score:+.1f} robuste standardavvik, {row.headcount} ansatte)"),
+            'metric': rule['metric'],
+            'value': row.value,
+            # Concrete positions index the full grid the same way
+            'explanation': generate_explanation(rule['explanation'], segments.segment_kpis(totals, row.position)),
+            'segment': segment,
+            'z_score': row.z_score,
+            'peer_median': row.peer_median,
+            'headcount': row.headcount,
+        })
+    return flags
+
+
+def generate_explanation(flag_type, kpis):
+    """Generate detailed explanation for each red flag"""
+    explanations = {
+        'turnover': f"""
+**Analyse av turnover:**
+- Total frivillig turnover: {kpis['voluntary_turnover']} ansatte
+- Hovedårsaker basert på exit-undersøkelser viser at ansatte med lav engasjementsscore ({kpis['avg_engagement']:.1f}/10) har høyere sannsynlighet for å slutte
+- Avdelinger med høyest turnover bør prioriteres for tiltak
+- Estimert kostnad for attrition: {kpis['cost_of_attrition']:,.0f} NOK
+
+**Anbefalte tiltak:**
+1. Gjennomfør stay-intervjuer med høy-risiko ansatte
+2. Revurder kompensasjonspakker for kritiske roller
+3. Styrk karriereutviklingsmuligheter
+        """,
+        'engagement': f"""
+**Analyse av engasjement:**
+- Gjennomsnittlig engasjementsscore: {kpis['avg_engagement']:.1f}/10
+- {kpis['high_flight_risk']} ansatte har høy flight risk
+- Det er sterk korrelasjon mellom engasjement og produktivitet
+
+**Påvirkningsfaktorer:**
+- Lederskap og feedback-kvalitet
+- Karriereutviklingsmuligheter
+- Work-life balance
+- Lønn relativt til markedet (compa-ratio: {kpis['avg_compa_ratio']:.2f})
+
+**Anbefalte tiltak:**
+1. Implementer pulse surveys for tettere oppfølging
+2. Utvikle ledertreningsprogrammer
+3. Etabler mentorordninger
+        """,
+        'flight_risk': f"""
+**Analyse av flight risk:**
+- {kpis['flight_risk_pct']:.1f}% av ansatte klassifisert som høy risiko
+- Risikofaktorer inkluderer: lav engasjement, lang tid siden forfremmelse, lønn under band-midtpunkt
+
+**Kostnad ved å miste disse ansatte:**
+Estimert erstatningskostnad er 1.5-2.5x årslønn per person.
+Med gjennomsnittlig lønn på {kpis['avg_salary']:,.0f} NOK representerer dette en betydelig risiko.
+
+**Anbefalte tiltak:**
+1. Prioriter retention-samtaler med topp-talenter
+2. Vurder akselerert lønnsrevisjon for underbetalt segment
+3. Tilby stretch assignments og synlighet for høytytende
+        """,
+        'time_to_hire': f"""
+**Analyse av rekrutteringstid:**
+- Gjennomsnittlig tid for å fylle stillinger: {kpis['avg_time_to_hire']:.0f} dager
+- Benchmark for bransjen er 35-45 dager
+
+**Konsekvenser av lang rekrutteringstid:**
+- Økt arbeidsbelastning på eksisterende ansatte
+- Tapt produktivitet og inntekt
+- Risiko for å miste gode kandidater til konkurrenter
+
+**Anbefalte tiltak:**
+1. Strømlinjeform intervjuprosessen
+2. Bygg sterkere talent pipeline
+3. Vurder bruk av referral-bonuser
+4. Optimaliser stillingsannonser og employer branding
+        """,
+        'sick_leave': f"""
+**Analyse av sykefravær:**
+- Sykefraværsrate: {kpis['sick_leave_rate']:.1f}%
+- Korrelerer ofte med lav engasjement og høy arbeidsbelastning
+- Sesongvariasjon (høyere i vintermånedene)
+
+**Kostnad av sykefravær:**
+Med headcount på {kpis['headcount']} og gjennomsnittlig dagsrate tilsier dette betydelige indirekte kostnader.
+
+**Anbefalte tiltak:**
+1. Analyser sykefravær per avdeling og leder
+2. Implementer helsefremmende tiltak
+3. Vurder fleksible arbeidsordninger
+4. Følg opp ledere med høyt fravær i team
+        """,
+        'bradford': f"""
+**Analyse av fraværsmønster (Bradford-faktor):**
+- Bradford-faktor = S² × D, der S er antall fraværsperioder og D antall sykedager siste 12 måneder
+- Gjennomsnittlig Bradford-faktor: {kpis['avg_bradford']:.0f} (terskel for månedsdata: {BRADFORD_THRESHOLD:.0f})
+- {kpis['bradford_high_pct']:.0f}% av ansatte ligger over {BRADFORD_THRESHOLD:.0f}
+- {kpis['sick_spells_per_employee']:.1f} fraværsperioder per ansatt, langtidsfravær utgjør {kpis['long_term_sick_pct']:.0f}% av sykedagene
+
+**Hvorfor det betyr noe:**
+Mange korte fravær forstyrrer driften mer enn ett langt fravær med samme antall dager.
+
+**Anbefalte tiltak:**
+1. Innfør tidlige oppfølgingssamtaler ved gjentatt korttidsfravær
+2. Se etter mønstre per leder og team
+3. Vurder tilrettelegging og arbeidsmiljøtiltak
+        """,
+        'salary': f"""
+**Analyse av lønnsposisjon:**
+- Gjennomsnittlig compa-ratio: {kpis['avg_compa_ratio']:.2f}
+- Idealområde er 0.95-1.05
+- Ansatte {'under' if kpis['avg_compa_ratio'] < 0.95 else 'over'} markedslønn
+
+**Risiko ved lønnsavvik:**
+- Under markedslønn: Høyere turnover, vanskelig å rekruttere
+- Over markedslønn: Høyere lønnskostnader, begrenset fleksibilitet
+
+**Anbefalte tiltak:**
+1. Gjennomfør lønnsmarkedsanalyse
+2. Prioriter justeringer for kritiske roller
+3. Kommuniser total rewards-pakke tydeligere
+        """,
+        'diversity': f"""
+**Analyse av kjønnsbalanse i ledelsen:**
+- Kvinner utgjør {kpis['gender_balance']:.0f}% av total arbeidsstyrke
+- Men betydelig lavere representasjon i lederroller
+- Mål: Minimum 40% av hvert kjønn i ledelsen
+
+**Konsekvenser av ubalanse:**
+- Begrenset perspektivmangfold i beslutninger
+- Svakere employer brand
+- Potensielt juridisk/regulatorisk risiko
+
+**Anbefalte tiltak:**
+1. Sett konkrete mål for kjønnsbalanse i ledelsen
+2. Utvikle talentprogrammer for underrepresenterte grupper
+3. Gjennomgå rekrutteringsprosesser for ubevisst bias
+4. Etabler sponsorprogrammer for kvinner
+        """,
+        'span_of_control': f"""
+**Analyse av span of control:**
+- Gjennomsnittlig {kpis['span_of_control']:.1f} ansatte per leder
+- Anbefalt nivå: 5-10 for de fleste roller
+
+**Konsekvenser av for bred span:**
+- Redusert tid til coaching og utvikling
+- Økt risiko for utbrenthet hos ledere
+- Svakere oppfølging og feedback
+
+**Anbefalte tiltak:**
+1. Identifiser ledere med >12 direct reports
+2. Vurder opprettelse av teamlead-roller
+3. Implementer peer coaching
+        """,
+        'mobility': f"""
+**Analyse av intern mobilitet:**
+- Kun {kpis['internal_mobility']:.1f}% har byttet rolle internt
+- Benchmark: 10-15% årlig intern mobilitet
+
+**Konsekvenser av lav mobilitet:**
+- Stagnasjon og redusert engasjement
+- Mister talenter til eksterne muligheter
+- Begrenset kunnskapsdeling på tvers
+
+**Anbefalte tiltak:**
+1. Etabler intern jobbmarked med synlige muligheter
+2. Oppmuntre ledere til å støtte interne bytter
+3. Fjern barrierer for tverrfaglig bevegelse
+4. Anerkjenn ledere som utvikler talent for andre avdelinger
+        """
+    }
+    return explanations.get(flag_type, "Ingen detaljert analyse tilgjengelig.")
+
+
+# =====================
+# TAB AGGREGATIONS
+# =====================
+def overview(dataset, spec):
+    """Headcount per department/country/seniority and engagement per department"""
+    active = filtered_active(dataset, spec, ['department', 'country', 'seniority_level', 'engagement_score'])
+
+    dept_counts = active.groupby('department', observed=True).size().reset_index(name='count')
+    dept_counts = dept_counts.sort_values('count', ascending=True)
+    # An empty selection has no largest department, country or lowest engagement
+    top_dept = dept_counts.iloc[-1] if len(dept_counts) > 0 else {'department': None, 'count': 0}
+
+    country_counts = active.groupby('country', observed=True).size().reset_index(name='count')
+    country_counts['pct'] = (country_counts['count'] / country_counts['count'].sum() * 100).round(0).astype(int)
+    country_counts['label'] = country_counts['country'].astype(str) + ': ' + country_counts['pct'].astype(str) + '%'
+
+    sen_counts = active.groupby('seniority_level', observed=True).size().reset_index(name='count')
+    mid_count = sen_counts[sen_counts['seniority_level'] == 'Mid']['count'].values
+
+    eng_dept = active.groupby('department', observed=True)['engagement_score'].mean().reset_index()
+    eng_dept = eng_dept.sort_values('engagement_score', ascending=True)
+    lowest_eng_dept = eng_dept.iloc[0] if len(eng_dept) > 0 else None
+
+    return {
+        'dept_counts': dept_counts,
+        'top_dept': top_dept['department'],
+        'top_dept_pct': _ratio(top_dept['count'], len(active), 100),
+        'country_counts': country_counts,
+        'top_country': country_counts.loc[country_counts['count'].idxmax(), 'country'] if len(country_counts) > 0 else None,
+        'sen_counts': sen_counts,
+        'mid_pct': (mid_count[0] / len(active) * 100) if len(mid_count) > 0 else 0,
+        'eng_dept': eng_dept,
+        'lowest_eng_dept': lowest_eng_dept['department'] if lowest_eng_dept is not None else None,
+        'eng_gap': (active['engagement_score'].mean() - lowest_eng_dept['engagement_score']
+                    if lowest_eng_dept is not None else 0),
+    }
+
+
+def turnover(dataset, spec):
+    """Turnover rate per department and month, termination reasons, attrition cost trend and flight risk"""
+    active = filtered_active(dataset, spec, ['name', 'department', 'seniority_level', 'tenure_years',
+                                             'engagement_score', 'salary', 'flight_risk'])
+    terminations = dataset.terminations
+
+    # Period turnover by department and per month, from the event timeline
+    start, end = spec.period()
+    by_dept = dataset.timeline.window_by('department', spec.selection(), start, end)
+    turnover_rate_dept = pd.DataFrame({
+        'department': by_dept.index.astype(str),
+        'terminations': by_dept['terminations'].astype(int).to_numpy(),
+        'headcount': by_dept['avg_headcount'].to_numpy(),
+        'rate': [kpis_from_window(w)['turnover_rate'] for w in by_dept.to_dict('records')],
+    })
+    turnover_rate_dept = turnover_rate_dept[turnover_rate_dept['headcount'] > 0]
+    turnover_sorted = turnover_rate_dept.sort_values('rate', ascending=False)
+
+    monthly = dataset.timeline.series(spec.selection()).iloc[dataset.timeline.window_slice(start, end)]
+    monthly = pd.DataFrame({
+        'month': monthly.index,
+        'headcount': monthly['headcount'].to_numpy(),
+        'turnover_rate': monthly_turnover(monthly).to_numpy(),
+    })
+
+    # Reasons and attrition cost (terminations follow the country filter only)
+    rows = terminations['employee_row'].to_numpy()
+    term_with_dept = terminations[rows >= 0]
+    if spec.country is not None:
+        country = dataset.employees['country'].array.take(rows[rows >= 0])
+        term_with_dept = term_with_dept[np.asarray(country == spec.country)]
+
+    # Termination reasons
+    term_filtered = term_with_dept if spec.country is not None else terminations
+    reason_counts = term_filtered['termination_reason'].value_counts().reset_index()
+    reason_counts.columns = ['reason', 'count']
+
+    # Cost of attrition over time (last 24 months)
+    month = term_with_dept['termination_date'].dt.to_period('M').astype(str)
+    cost_by_month = term_with_dept.groupby(month)['replacement_cost'].sum().rename_axis('month').reset_index()
+    cost_by_month = cost_by_month.tail(24)
+
+    # Flight risk
+    flight_by_dept = active.groupby(['department', 'flight_risk'], observed=True).size().unstack(fill_value=0)
+    flight_by_dept_pct = flight_by_dept.div(flight_by_dept.sum(axis=1), axis=0) * 100
+
+    high_risk = active[active['flight_risk'] == 'High'].sort_values('salary', ascending=False).head(10)
+
+    return {
+        'turnover_by_dept': turnover_sorted,
+        'critical_depts': turnover_sorted[turnover_sorted['rate'] > 15]['department'].tolist(),
+        'monthly': monthly,
+        'reason_counts': reason_counts,
+        'cost_by_month': cost_by_month,
+        'flight_by_dept_pct': flight_by_dept_pct.reset_index().melt(id_vars='department'),
+        'high_risk': high_risk[['name', 'department', 'seniority_level', 'tenure_years', 'engagement_score', 'salary']],
+    }
+
+
+def workforce(dataset, spec):
+    """Age, gender by seniority, tenure, internal mobility, training and leader rollups"""
+    active = filtered_active(dataset, spec, ['department', 'seniority_level', 'gender', 'age_group', 'tenure_years',
+                                             'internal_moves', 'training_hours_ytd'])
+
+    gender_sen = active.groupby(['seniority_level', 'gender'], observed=True).size().unstack(fill_value=0)
+    director_plus = active[active['seniority_level'].isin(LEADERSHIP_LEVELS)]
+    female_leadership_pct = (len(director_plus[director_plus['gender'] == 'F']) / len(director_plus) * 100) \
+        if len(director_plus) > 0 else 0
+
+    mobility_dept = active.groupby('department', observed=True)['internal_moves'].mean().reset_index()
+    training_dept = active.groupby('department', observed=True)['training_hours_ytd'].mean().reset_index()
+
+    return {
+        'age_counts': active.groupby('age_group', observed=True).size().reset_index(name='count'),
+        'gender_by_seniority': gender_sen.reset_index().melt(id_vars='seniority_level'),
+        'female_leadership_pct': female_leadership_pct,
+        'tenure': active[['tenure_years']],
+        'avg_tenure': active['tenure_years'].mean(),
+        'mobility_by_dept': mobility_dept.sort_values('internal_moves', ascending=False),
+        'training_by_dept': training_dept.sort_values('training_hours_ytd', ascending=False),
+        'leaders': leader_rollup(dataset, spec),
+    }
+
+
+def leader_rollup(dataset, spec):
+    """Whole-organisation figures for every active people manager matching the filters
+
+    Each leader's organisation is their full reporting line (active employees
+    only), including people outside the filters. Sorted by organisation size.
+    """
+    employees = dataset.employees
+    rows = filtered_rows(dataset, spec)
+    rows = rows[employees['direct_reports'].to_numpy()[rows] > 0]
+    tree, prefix = dataset.org_tree, dataset.org_prefix
+    headcount = tree.subtree_sums(prefix['headcount'], rows)
+
+    leaders = employees.iloc[rows][['name', 'job_title', 'department', 'country', 'direct_reports']].copy()
+    leaders['org_headcount'] = headcount - 1  # Everyone below the leader
+    leaders['avg_engagement'] = tree.subtree_sums(prefix['engagement'], rows) / headcount
+    leaders['high_flight_risk_pct'] = tree.subtree_sums(prefix['high_flight_risk'], rows) / headcount * 100
+    leaders['salary_cost'] = tree.subtree_sums(prefix['salary'], rows)
+    return leaders.sort_values('org_headcount', ascending=False, kind='stable')
+
+
+def compensation(dataset, spec):
+    """Compa-ratio per department, salary spread, gender pay gap and underpaid employees"""
+    comp = filtered_active(dataset, spec, ['name', 'department', 'seniority_level', 'gender', 'salary', 'compa_ratio'])
+
+    compa_dept = comp.groupby('department', observed=True)['compa_ratio'].mean().reset_index()
+
+    # Gender pay gap by seniority
+    # Levels without men or women (or no employees at all) have no gap
+    gender_pay = comp.groupby(['seniority_level', 'gender'], observed=True)['salary'].mean().unstack()
+    gender_pay = gender_pay.reindex(columns=['M', 'F'])
+    gap_pct = ((gender_pay['M'] - gender_pay['F']) / gender_pay['M'] * 100).fillna(0)
+
+    # Underpaid employees (compa < 0.90)
+    underpaid = comp[comp['compa_ratio'] < 0.90].sort_values('compa_ratio').head(10)
+
+    return {
+        'compa_by_dept': compa_dept.sort_values('compa_ratio'),
+        'salaries': comp[['seniority_level', 'salary']],
+        'gender_pay_gap': gap_pct.rename('gap_pct').reset_index(),
+        'underpaid': underpaid[['name', 'department', 'seniority_level', 'salary', 'compa_ratio']],
+    }
+
+
+def recruitment(dataset, spec):
+    """Time-to-fill per department and over time, sources and the hiring funnel"""
+    recruit_filtered = dataset.recruitment
+    # One combined mask, so at most one filtered copy of the table is made
+    keep = None
+    for dim in ('department', 'country'):
+        if getattr(spec, dim) is not None:
+            match = (recruit_filtered[dim] == getattr(spec, dim)).to_numpy()
+            keep = match if keep is None else keep & match
+    if keep is not None:
+        recruit_filtered = recruit_filtered[keep]
+
+    ttf_dept = recruit_filtered.groupby('department', observed=True)['days_to_fill'].mean().reset_index()
+
+    source_counts = recruit_filtered['source'].value_counts().reset_index()
+    source_counts.columns = ['source', 'count']
+
+    month = recruit_filtered['close_date'].dt.to_period('M').astype(str)
+    ttf_trend = recruit_filtered.groupby(month)['days_to_fill'].mean().rename_axis('month').reset_index()
+
+    return {
+        'ttf_by_dept': ttf_dept.sort_values('days_to_fill', ascending=False),
+        'source_counts': source_counts,
+        'ttf_trend': ttf_trend.tail(24),
+        'screened': recruit_filtered['candidates_screened'].sum(),
+        'interviewed': recruit_filtered['candidates_interviewed'].sum(),
+        'hired': len(recruit_filtered),
+    }
+
+
+# =====================
+# WHAT-IF SIMULATOR
+# =====================
+# Employee columns carried by a high-risk segment (including the flight risk rule inputs)
+SEGMENT_COLUMNS = ['name', 'seniority_level', 'training_hours_ytd', 'flight_risk'] + flight_risk.SCORE_COLUMNS
+
+# Probability of leaving within a year without any intervention, by flight risk level
+ATTRITION_PROBABILITY = {'Low': 0.05, 'Medium': 0.15, 'High': 0.40}
+LEVEL_PROBABILITY = np.array([ATTRITION_PROBABILITY[level] for level in data_store.FLIGHT_RISK_ORDER])
+
+# Intervention model. A salary increase and the engagement program change the
+# inputs of the flight risk rules, and an employee's leaving probability
+# follows their re-scored level. Training is no rule input; it cuts the
+# probability directly.
+ENGAGEMENT_PROGRAM_LIFT = 0.5  # Engagement score points
+TRAINING_EFFECT = 0.5  # % cut per extra training hour
+MAX_RISK_REDUCTION = 80.0
+TRAINING_COST_PER_HOUR = 500
+ENGAGEMENT_PROGRAM_COST = 50000
+
+# Monte Carlo settings
+SIMULATION_TRIALS = 2000
+SIMULATION_SEED = 42  # Fixed, so every slider position sees the same draws
+MAX_SIMULATION_DRAWS = 10_000_000  # trials x employees; very large segments get fewer trials
+SIMULATION_CHUNK = 2_000_000  # Draws held in memory at once
+EFFECT_UNCERTAINTY = 0.35  # Lognormal sigma of how well the interventions work in a trial
+
+
+def high_risk_segment(dataset, spec, sim_dept=None, sim_seniority=None):
+    """High flight risk employees in the filtered population, optionally narrowed further"""
+    rows = filtered_rows(dataset, spec)
+    if sim_dept is not None and sim_dept != ALL:
+        rows = rows_where(dataset, rows, 'department', sim_dept)
+    if sim_seniority is not None and sim_seniority != ALL:
+        rows = rows_where(dataset, rows, 'seniority_level', sim_seniority)
+    rows = rows_where(dataset, rows, 'flight_risk', 'High')
+    return filtered_active(dataset, spec, SEGMENT_COLUMNS, rows=rows)
+
+
+def rescored_levels(segment, salary_increase=0, engagement_program=False):
+    """Flight risk level codes of the segment's employees after a salary increase / the engagement program
+
+    Arrays of options add leading axes: the result is options x employees.
+    """
+    salary = segment['salary'].to_numpy(dtype=float) * (1 + np.asarray(salary_increase, dtype=float)[..., None] / 100)
+    engagement = (segment['engagement_score'].to_numpy(dtype=float)
+                  + ENGAGEMENT_PROGRAM_LIFT * np.asarray(engagement_program)[..., None])
+    return flight_risk.levels(flight_risk.points(segment, salary=salary, engagement=engagement))
+
+
+def risk_reduction(level_before, level_after, training_increase):
+    """Cut (fraction) in the leaving probability for a move between rescored levels plus extra training; broadcasts"""
+    training_cut = np.minimum(np.asarray(training_increase) * TRAINING_EFFECT, MAX_RISK_REDUCTION) / 100
+    remaining = LEVEL_PROBABILITY[level_after] / LEVEL_PROBABILITY[level_before] * (1 - training_cut)
+    return np.minimum(1 - remaining, MAX_RISK_REDUCTION / 100)
+
+
+def intervention_cost(salary_sum, headcount, salary_increase, training_increase, engagement_program):
+    """Cost of the interventions for a group with the given total salary and headcount; broadcasts"""
+    return (np.asarray(salary_increase) / 100 * salary_sum
+            + np.asarray(training_increase) * TRAINING_COST_PER_HOUR * headcount
+            + np.asarray(engagement_program) * ENGAGEMENT_PROGRAM_COST)
+
+
+def _per_category(values, mapping, default):
+    """mapping applied to a categorical Series through its codes, as a float array"""
+    values = values.astype('category')
+    lookup = np.array([mapping.get(c, default) for c in values.cat.categories] + [default], dtype=float)
+    return lookup[values.cat.codes.to_numpy()]  # Code -1 (missing) picks the trailing default
+
+
+def attrition_risk(segment):
+    """Per employee: probability of leaving within a year and replacement cost if they do"""
+    probability = _per_category(segment['flight_risk'], ATTRITION_PROBABILITY, 0.0)
+    multiplier = _per_category(segment['seniority_level'], data_store.REPLACEMENT_COST_MULTIPLIER,
+                               data_store.DEFAULT_REPLACEMENT_MULTIPLIER)
+    return probability, segment['salary'].to_numpy(dtype=float) * multiplier
+
+
+def simulate(segment, salary_increase, training_increase, engagement_program, trials=SIMULATION_TRIALS):
+    """Monte Carlo projection of the interventions' effect on the turnover cost of a segment
+
+    Every trial draws, for every employee, whether they leave within a year,
+    from their own leaving probability (flight risk level) and replacement
+    cost (salary x seniority multiplier), once without and once with the
+    interventions. With the interventions each employee is re-scored with
+    their new salary and engagement. Both scenarios compare the same uniform
+    draw (common random numbers), so their difference only reflects the
+    interventions; how well the interventions work varies between trials.
+    Returns expected values, P10/P50/P90 of the net benefit and the
+    per-trial net benefits.
+    """
+    n = len(segment)
+    probability, replacement_cost = attrition_risk(segment)
+    level_before = flight_risk.levels(flight_risk.points(segment))
+    level_after = rescored_levels(segment, salary_increase, engagement_program)
+    reduction = risk_reduction(level_before, level_after, training_increase)
+    cost = float(intervention_cost(segment['salary'].sum(), n, salary_increase, training_increase, engagement_program))
+
+    trials = max(1, min(trials, MAX_SIMULATION_DRAWS // max(n, 1)))
+    rng = np.random.default_rng(SIMULATION_SEED)
+    effect = rng.lognormal(-EFFECT_UNCERTAINTY ** 2 / 2, EFFECT_UNCERTAINTY, trials)  # Mean 1
+
+    # Leavers and their replacement cost per trial, without and with the interventions
+    leavers, lost = np.zeros((2, trials)), np.zeros((2, trials))
+    p = probability.astype(np.float32)
+    step = max(1, SIMULATION_CHUNK // max(n, 1))
+    for start in range(0, trials, step):
+        block = slice(start, min(start + step, trials))
+        u = rng.random((block.stop - block.start, n), dtype=np.float32)
+        remaining = 1 - np.minimum(reduction * effect[block, None], MAX_RISK_REDUCTION / 100)
+        for scenario, leaves in enumerate([u < p, u < p * remaining.astype(np.float32)]):
+            leavers[scenario, block] = leaves.sum(axis=1)
+            lost[scenario, block] = leaves @ replacement_cost
+
+    net = lost[0] - lost[1] - cost
+    current_turnover_cost, cost_after = lost.mean(axis=1)
+    saved = current_turnover_cost - cost_after
+    p10, p50, p90 = np.percentile(net, [10, 50, 90])
+    return {
+        'current_high_risk': n,
+        'current_avg_salary': segment['salary'].mean() if n > 0 else 0,
+        'expected_leavers': leavers[0].mean(),
+        'current_turnover_cost': current_turnover_cost,
+        'total_risk_reduction': _ratio(probability @ reduction, probability.sum(), 100),
+        'rescored_lower': int((level_after < level_before).sum()),
+        'projected_risk_reduction': leavers[0].mean() - leavers[1].mean(),
+        'projected_remaining_risk': leavers[1].mean(),
+        'intervention_cost': cost,
+        'projected_saved_turnover': saved,
+        'net_benefit': saved - cost,
+        'net_benefit_p10': p10,
+        'net_benefit_p50': p50,
+        'net_benefit_p90': p90,
+        'profitable_share': (net > 0).mean() * 100,
+        'net_benefit_trials': net,
+        'trials': trials,
+        'cost_after': cost_after + cost,
+        'roi': ((saved - cost) / cost) * 100 if cost > 0 else None,
+    }
+
+
+# Options the budget optimizer tries for every cell (the simulator slider ranges)
+SALARY_OPTIONS = np.arange(0, 21)  # %
+PROGRAM_OPTIONS = np.array([False, True])
+TRAINING_OPTIONS = np.arange(0, 41, 5)  # Hours
+BUDGET_STEPS = 2000  # Budget resolution of the allocation; option costs are rounded up to a step
+
+
+def optimize_budget(dataset, spec, budget):
+    """Interventions per (department, seniority level) that maximize expected net benefit within budget
+
+    Covers the high flight risk employees matching the filters, with the
+    simulator's cost and risk reduction model (re-scored flight risk) at its
+    expected effect. Every cell is evaluated against every option in one
+    broadcast; a multiple-choice knapsack over the budget then picks one
+    option per cell.
+    Returns (allocation, totals): one row per cell that gets an intervention,
+    sorted by net benefit.
+    """
+    employees = dataset.employees
+    rows = rows_where(dataset, filtered_rows(dataset, spec), 'flight_risk', 'High')
+    segment = employees.iloc[rows][SEGMENT_COLUMNS]
+    probability, replacement_cost = attrition_risk(segment)
+
+    # Per cell: headcount and salary sum
+    departments = segment['department'].cat.categories
+    levels = segment['seniority_level'].cat.categories
+    dept_codes, level_codes = segment['department'].cat.codes.to_numpy(), segment['seniority_level'].cat.codes.to_numpy()
+    known = (dept_codes >= 0) & (level_codes >= 0)
+    cell = (dept_codes.astype(np.int64) * len(levels) + level_codes)[known]
+    n_cells = len(departments) * len(levels)
+    headcount = np.bincount(cell, minlength=n_cells)
+    salary_sum = np.bincount(cell, weights=segment['salary'].to_numpy(dtype=float)[known], minlength=n_cells)
+    cells = np.flatnonzero(headcount)
+
+    # Re-score every employee under every salary x program option (options x employees) and
+    # sum the expected replacement cost per cell, option, level before and level after
+    rescore_salary, rescore_program = (g.ravel() for g in np.meshgrid(SALARY_OPTIONS, PROGRAM_OPTIONS, indexing='ij'))
+    n_rescored, n_levels = len(rescore_salary), len(LEVEL_PROBABILITY)
+    before = flight_risk.levels(flight_risk.points(segment))[known]
+    after = rescored_levels(segment, rescore_salary, rescore_program)[:, known]
+    move = ((cell * n_rescored + np.arange(n_rescored)[:, None]) * n_levels + before) * n_levels + after
+    loss = np.broadcast_to((probability * replacement_cost)[known], move.shape)
+    loss_by_move = np.bincount(move.ravel(), weights=loss.ravel(), minlength=n_cells * n_rescored * n_levels ** 2)
+    loss_by_move = loss_by_move.reshape(n_cells, n_rescored, n_levels, n_levels)[cells]
+
+    # Every cell x option (salary x program x training) at once; option 0 is "no intervention"
+    codes = np.arange(n_levels)
+    reduction = risk_reduction(codes[:, None, None], codes[None, :, None], TRAINING_OPTIONS)  # before x after x training
+    salary, program, training = (g.ravel() for g in np.meshgrid(SALARY_OPTIONS, PROGRAM_OPTIONS, TRAINING_OPTIONS, indexing='ij'))
+    saved = np.einsum('csba,bat->cst', loss_by_move, reduction).reshape(len(cells), len(salary))
+    cost = intervention_cost(salary_sum[cells, None], headcount[cells, None], salary, training, program)
+    net = saved - cost
+
+    # Option costs in whole budget steps, rounded up so the allocation never exceeds the budget
+    step = budget / BUDGET_STEPS if budget > 0 else 1.0
+    weight = np.ceil(cost / step - 1e-9).astype(np.int64)
+    picked = _pick_options(weight, net, BUDGET_STEPS if budget > 0 else 0)
+
+    chosen = picked > 0
+    index = np.arange(len(cells))[chosen], picked[chosen]
+    allocation = pd.DataFrame({
+        'department': np.asarray(departments)[cells[chosen] // len(levels)],
+        'seniority_level': np.asarray(levels)[cells[chosen] % len(levels)],
+        'headcount': headcount[cells[chosen]],
+        'salary_increase': salary[picked[chosen]],
+        'training_increase': training[picked[chosen]],
+        'engagement_program': program[picked[chosen]],
+        'cost': cost[index],
+        'saved': saved[index],
+        'net_benefit': net[index],
+    }).sort_values('net_benefit', ascending=False, kind='stable').reset_index(drop=True)
+    totals = {
+        'budget': budget,
+        'cost': allocation['cost'].sum(),
+        'saved': allocation['saved'].sum(),
+        'net_benefit': allocation['net_benefit'].sum(),
+        'cells': len(cells),
+        'options': len(salary),
+    }
+    return allocation, totals
+
+
+def _pick_options(weight, net, capacity):
+    """Multiple-choice knapsack: one option (column) per row maximizing total net within capacity
+
+    Column 0 must be the free "do nothing" option. Dynamic programming over
+    the rows, with best[b] the top total of the rows so far within b units.
+    """
+    n_rows = len(weight)
+    capacity_units = np.arange(capacity + 1)
+    best = np.zeros(capacity + 1)
+    choice = np.zeros((n_rows, capacity + 1), dtype=np.int64)
+    for i in range(n_rows):
+        # Only options that beat every cheaper one can be picked (column 0 always survives)
+        order = np.lexsort((-net[i], weight[i]))
+        order = order[weight[i, order] <= capacity]
+        keep = order[net[i, order] > np.maximum.accumulate(np.r_[-np.inf, net[i, order]])[:-1]]
+        before = capacity_units[None, :] - weight[i, keep][:, None]  # options x capacity
+        candidate = np.where(before >= 0, best[np.maximum(before, 0)] + net[i, keep][:, None], -np.inf)
+        choice[i] = keep[candidate.argmax(axis=0)]
+        best = candidate.max(axis=0)
+
+    # Walk back from the full capacity to the option picked for each row
+    picked = np.zeros(n_rows, dtype=np.int64)
+    for i in reversed(range(n_rows)):
+        picked[i] = choice[i, capacity]
+        capacity -= weight[i, picked[i]]
+    return picked
+
+
+# =====================
+# CHAT MED DATA
+# =====================
+def answer_question(dataset, spec, question, kpis=None):
+    """Simple rule-based question answering for demo purposes; returns (markdown answer, chart spec or None)"""
+    question_lower = question.lower()
+    active = filtered_active(dataset, spec, ['department', 'country', 'seniority_level', 'job_family', 'gender',
+                                             'flight_risk', 'engagement_score', 'compa_ratio'])
+    employees = dataset.employees
+    terminations = dataset.terminations
+    recruitment_df = dataset.recruitment
+    no_employees = ("Ingen aktive ansatte matcher de valgte filtrene. Prøv et bredere utvalg i sidepanelet.", None)
+
+    if any(word in question_lower for word in ['lønnsavvik', 'lønn', 'compa', 'underbetalt', 'salary']):
+        if len(active) == 0:
+            return no_employees
+        # Compensation analysis
+        dept_compa = active.groupby('department', observed=True)['compa_ratio'].mean().sort_values()
+        lowest_dept = dept_compa.index[0]
+        lowest_ratio = dept_compa.iloc[0]
+
+        country_compa = active.groupby('country', observed=True)['compa_ratio'].mean().sort_values()
+        lowest_country = country_compa.index[0]
+
+        answer = f"""
+**Lønnsavvik-analyse:**
+
+📊 **Største lønnsavvik per avdeling:**
+- **{lowest_dept}** har lavest compa-ratio på **{lowest_ratio:.2f}** (under markedssnitt)
+- Dette betyr at ansatte i denne avdelingen i snitt tjener {(1-lowest_ratio)*100:.0f}% under lønnsbandets midtpunkt
+
+📍 **Per land:**
+- **{lowest_country}** har lavest lønnsnivå relativt til band
+
+🔴 **Risiko:** Lavt lønnsnivå korrelerer med høyere flight risk og turnover.
+
+**Se graf:** 'Compensation' tab → Compa-Ratio per Avdeling
+        """
+
+        return answer, chart(
+            'bar', dept_compa.reset_index(), 'Compa-Ratio per Avdeling (1.0 = markedssnitt)',
+            x='compa_ratio', y='department', orientation='h',
+            color='compa_ratio', color_continuous_scale=['red', 'yellow', 'green'],
+            vline=dict(x=1.0, line_dash="dash", line_color="black")
+        )
+
+    elif any(word in question_lower for word in ['turnover', 'slutter', 'attrition', 'avganger']):
+        # Turnover analysis
+        rows = terminations['employee_row'].to_numpy()
+        departments = employees['department'].cat
+        codes = departments.codes.to_numpy()[rows[rows >= 0]]
+        turnover_counts = pd.Series(np.bincount(codes[codes >= 0], minlength=len(departments.categories)),
+                                    index=departments.categories.rename('department'))
+        turnover_counts = turnover_counts[turnover_counts > 0].sort_values(ascending=False)
+        highest_dept = turnover_counts.index[0]
+        highest_count = turnover_counts.iloc[0]
+        reasons = terminations['termination_reason']
+
+        answer = f"""
+**Turnover-analyse:**
+
+📊 **Høyest turnover per avdeling:**
+1. **{highest_dept}**: {highest_count} avganger
+2. **{turnover_counts.index[1]}**: {turnover_counts.iloc[1]} avganger
+3. **{turnover_counts.index[2]}**: {turnover_counts.iloc[2]} avganger
+
+💰 **Total kostnad av attrition:** {terminations['replacement_cost'].sum():,.0f} NOK
+
+**Årsaker (fra exit-undersøkelser):**
+- {(reasons == 'Voluntary').sum()} frivillige avganger
+- {(reasons == 'Involuntary').sum()} ufrivillige avganger
+
+**Se graf:** 'Turnover' tab → Turnover Rate per Avdeling
+        """
+
+        return answer, chart(
+            'bar', turnover_counts.rename('count').reset_index(), 'Antall Avganger per Avdeling',
+            x='department', y='count', color='count', color_continuous_scale=['green', 'yellow', 'red']
+        )
+
+    elif any(word in question_lower for word in ['engasjement', 'engagement', 'motivasjon', 'trivsel']):
+        if len(active) == 0:
+            return no_employees
+        # Engagement analysis
+        eng_dept = active.groupby('department', observed=True)['engagement_score'].mean().sort_values()
+        lowest_eng_dept = eng_dept.index[0]
+        lowest_eng = eng_dept.iloc[0]
+
+        eng_country = active.groupby('country', observed=True)['engagement_score'].mean().sort_values()
+        lowest_eng_country = eng_country.index[0]
+
+        answer = f"""
+**Engasjements-analyse:**
+
+📊 **Lavest engasjement:**
+- **{lowest_eng_dept}** har lavest score på **{lowest_eng:.1f}/10**
+- **{lowest_eng_country}** har lavest nasjonal score
+
+🎯 **Organisasjonssnitt:** {active['engagement_score'].mean():.1f}/10 (mål: 6.5)
+
+⚠️ **Risiko:** {(active['engagement_score'] < 6).sum()} ansatte har engagement under 6.0
+
+**Korrelasjon:**
+- Lav engagement → Høyere sykefravær
+- Lav engagement → Høyere turnover-risiko
+
+**Se graf:** 'Overview' tab → Engasjement per Avdeling
+        """
+
+        return answer, chart(
+            'bar', eng_dept.reset_index(), 'Engasjementsscore per Avdeling',
+            x='engagement_score', y='department', orientation='h',
+            color='engagement_score', color_continuous_scale=['red', 'yellow', 'green'],
+            vline=dict(x=6.5, line_dash="dash", line_color="red", annotation_text="Mål")
+        )
+
+    elif any(word in question_lower for word in ['sykefravær', 'syk', 'fravær', 'sick']):
+        # Sick leave analysis
+        sick_dept = employees.groupby('department', observed=True)['sick_days_total'].sum() \
+            .rename('sick_days').sort_values(ascending=False)
+        highest_sick = sick_dept.index[0]
+        kpis = kpis if kpis is not None else calculate_kpis(dataset, spec)
+
+        answer = f"""
+**Sykefraværs-analyse:**
+
+📊 **Høyest sykefravær:**
+- **{highest_sick}** har flest sykedager totalt
+- Gjennomsnittlig sykefraværsrate: {kpis['sick_leave_rate']:.1f}%
+- Langtidsfravær utgjør {kpis['long_term_sick_pct']:.0f}% av sykedagene
+- Gjennomsnittlig Bradford-faktor: {kpis['avg_bradford']:.0f} ({kpis['bradford_high_pct']:.0f}% over {BRADFORD_THRESHOLD:.0f})
+
+📅 **Sesongvariasjon:** Høyere fravær i vintermånedene (jan-feb, nov-des)
+
+**Korrelasjon med engagement:**
+- Ansatte med lav engagement har 40% høyere sykefravær
+
+**Se graf:** Se 'Overview' for avdelingsfordeling
+        """
+
+        return answer, chart(
+            'bar', sick_dept.reset_index(), 'Totale Sykedager per Avdeling (2024)',
+            x='department', y='sick_days', color='sick_days', color_continuous_scale=['green', 'yellow', 'red']
+        )
+
+    elif any(word in question_lower for word in ['rekruttering', 'hire', 'ansette', 'time to fill']):
+        # Recruitment analysis
+        ttf_dept = recruitment_df.groupby('department', observed=True)['days_to_fill'].mean().sort_values(ascending=False)
+        slowest = ttf_dept.index[0]
+        slowest_days = ttf_dept.iloc[0]
+        sources = recruitment_df['source']
+
+        answer = f"""
+**Rekrutterings-analyse:**
+
+📊 **Lengst rekrutteringstid:**
+- **{slowest}**: {slowest_days:.0f} dager i snitt
+- Benchmark: 45 dager
+
+🎯 **Beste kilder:**
+- LinkedIn: {(sources == 'LinkedIn').sum()} ansettelser
+- Referral: {(sources == 'Referral').sum()} ansettelser
+
+**Se graf:** 'Recruitment' tab → Time-to-Fill per Avdeling
+        """
+
+        return answer, chart(
+            'bar', ttf_dept.reset_index(), 'Gjennomsnittlig Time-to-Fill (dager)',
+            x='department', y='days_to_fill', color='days_to_fill', color_continuous_scale=['green', 'yellow', 'red'],
+            hline=dict(y=45, line_dash="dash", line_color="red")
+        )
+
+    elif any(word in question_lower for word in ['diversity', 'kjønn', 'kvinner', 'menn', 'gender']):
+        if len(active) == 0:
+            return no_employees
+        # Diversity analysis
+        in_leadership = active['job_family'].isin(MANAGEMENT_FAMILIES)
+        total_leadership = in_leadership.sum()
+        female_pct = (in_leadership & (active['gender'] == 'F')).sum() / total_leadership * 100 if total_leadership > 0 else 0
+        men = (active['gender'] == 'M').sum()
+        women = (active['gender'] == 'F').sum()
+
+        answer = f"""
+**Diversity-analyse:**
+
+📊 **Kjønnsfordeling total:**
+- Menn: {men} ({men/len(active)*100:.0f}%)
+- Kvinner: {women} ({women/len(active)*100:.0f}%)
+
+👔 **I ledelsen (Management + Executive):**
+- Kvinner: **{female_pct:.0f}%** (mål: 40%)
+
+⚠️ **Gap:** Kvinner er underrepresentert på Director+ nivå
+
+**Se graf:** 'Workforce' tab → Kjønnsfordeling per Senioritetsnivå
+        """
+
+        gender_sen = active.groupby(['seniority_level', 'gender'], observed=True).size().unstack(fill_value=0)
+        return answer, chart(
+            'bar', gender_sen.reset_index().melt(id_vars='seniority_level'), 'Kjønnsfordeling per Nivå',
+            x='seniority_level', y='value', color='gender', barmode='group',
+            color_discrete_map={'M': '#4169E1', 'F': '#FF69B4', 'Other': '#90EE90'}
+        )
+
+    elif any(word in question_lower for word in ['flight risk', 'risiko', 'miste', 'beholde']):
+        if len(active) == 0:
+            return no_employees
+        # Flight risk analysis
+        is_high = active['flight_risk'] == 'High'
+        risk_dept = is_high.groupby(active['department'], observed=True).sum().rename('flight_risk').sort_values(ascending=False)
+        top_risk_depts = "\n".join(f"{i}. **{dept}**: {count} høy-risiko ansatte"
+                                   for i, (dept, count) in enumerate(risk_dept.head(2).items(), start=1))
+
+        answer = f"""
+**Flight Risk-analyse:**
+
+📊 **Avdelinger med høyest risiko:**
+{top_risk_depts}
+
+⚠️ **Totalt:** {is_high.sum()} ansatte med høy flight risk
+
+**Risikofaktorer:**
+- Lav engagement (<6)
+- Lang tid siden forfremmelse
+- Under markedslønn
+
+**Se graf:** 'Turnover' tab → Flight Risk Analyse
+        """
+
+        return answer, chart(
+            'bar', risk_dept.reset_index(), 'Antall Høy-Risiko Ansatte per Avdeling',
+            x='department', y='flight_risk', color='flight_risk', color_continuous_scale=['green', 'yellow', 'red']
+        )
+
+    else:
+        # General response
+        kpis = kpis if kpis is not None else calculate_kpis(dataset, spec)
+        answer = f"""
+**Generell HR-oversikt:**
+
+👥 **Headcount:** {kpis['headcount']:,} ansatte
+📉 **Turnover:** {kpis['turnover_rate']:.1f}%
+💚 **Engagement:** {kpis['avg_engagement']:.1f}/10
+⏱️ **Time-to-Hire:** {kpis['avg_time_to_hire']:.0f} dager
+🏥 **Sykefravær:** {kpis['sick_leave_rate']:.1f}%
+
+**Prøv spørsmål som:**
+- "Hvor har vi størst lønnsavvik?"
+- "Hvilken avdeling har høyest turnover?"
+- "Hvordan er kjønnsfordelingen i ledelsen?"
+- "Hvilke ansatte har høyest flight risk?"
+- "Hvordan er engasjementet per avdeling?"
+        """
+        return answer, None
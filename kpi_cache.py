@@ -0,0 +1,88 @@
+"""
+KPI Cache
+Process-wide LRU cache with a time-to-live, shared by every Streamlit
+session. Used for results that depend only on the dataset version and the
+filter state, so reruns triggered by unrelated widgets reuse them.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe LRU cache with optional TTL and hit/miss counters"""
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]  # Expired
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling compute() on a miss"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            # Computed outside the lock so other sessions are never blocked
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+            }
+
+
+# Shared by all sessions in this process. Size and TTL (seconds) can be set
+# with HR_KPI_CACHE_SIZE and HR_KPI_CACHE_TTL; a TTL of 0 disables expiry.
+KPI_CACHE = LRUCache(
+    maxsize=int(os.environ.get('HR_KPI_CACHE_SIZE', 256)),
+    ttl=float(os.environ.get('HR_KPI_CACHE_TTL', 3600)) or None,
+)
+
+# Per-tab engine results hold DataFrames, some with one row per employee, so
+# this cache is kept much smaller (HR_TAB_CACHE_SIZE). Cached frames are shared
+# between sessions and must not be modified by the caller.
+TAB_CACHE = LRUCache(
+    maxsize=int(os.environ.get('HR_TAB_CACHE_SIZE', 32)),
+    ttl=float(os.environ.get('HR_KPI_CACHE_TTL', 3600)) or None,
+)
@@ -0,0 +1,116 @@
+"""
+Org Tree Index
+The reporting hierarchy from manager_id as integer arrays: parent row per
+employee, CSR child lists and a pre-order (Euler tour) numbering. Every
+subtree occupies one contiguous range of the tour, so a leader's whole
+organisation is aggregated with two lookups in a prefix sum instead of a
+recursive walk. Built with one vectorized numpy pass per level of depth, so
+hundreds of thousands of nodes in a realistic hierarchy take well under a
+second.
+"""
+
+import numpy as np
+
+
+class OrgTree:
+    """Parent, children and tour ranges for every employee row"""
+
+    def __init__(self, parent):
+        n = len(parent)
+        self.parent = parent  # Row of the manager, -1 for roots; must be acyclic
+
+        # CSR children: children[child_ptr[i]:child_ptr[i + 1]] report to row i, in row order
+        has_parent = parent >= 0
+        self.direct_reports = np.bincount(parent[has_parent], minlength=n)
+        self.child_ptr = np.concatenate([[0], np.cumsum(self.direct_reports)])
+        self.children = np.flatnonzero(has_parent)[np.argsort(parent[has_parent], kind='stable')]
+
+        # Breadth-first levels from the roots
+        self.depth = np.zeros(n, dtype=np.int32)
+        levels = []
+        frontier = np.flatnonzero(~has_parent)
+        while len(frontier):
+            self.depth[frontier] = len(levels)
+            levels.append(frontier)
+            frontier = self._children_of(frontier)
+
+        # Subtree sizes bottom-up, then tour positions top-down: a child starts
+        # right after its parent plus the subtrees of its earlier siblings
+        self.size = np.ones(n, dtype=np.int64)
+        for level in reversed(levels[1:]):
+            np.add.at(self.size, self.parent[level], self.size[level])
+        self.tin = np.zeros(n, dtype=np.int64)
+        roots = levels[0]
+        self.tin[roots] = np.cumsum(self.size[roots]) - self.size[roots]
+        for level in levels[:-1]:
+            kids = self._children_of(level)
+            if len(kids) == 0:
+                continue
+            owner = self.parent[kids]  # kids are grouped by parent, parents in level order
+            before = np.cumsum(self.size[kids]) - self.size[kids]
+            group_start = np.r_[True, owner[1:] != owner[:-1]]
+            before -= np.maximum.accumulate(np.where(group_start, before, 0))
+            self.tin[kids] = self.tin[owner] + 1 + before
+        self.order = np.argsort(self.tin)  # Tour position -> row
+
+    def _children_of(self, rows):
+        """Children of every row in rows, grouped by parent in the order of rows"""
+        starts, counts = self.child_ptr[rows], self.direct_reports[rows]
+        if counts.sum() == 0:
+            return np.empty(0, dtype=np.int64)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return self.children[np.repeat(starts, counts) + offsets]
+
+    @classmethod
+    def build(cls, employees):
+        """Tree over the employee rows from the manager_row key (data_store.add_row_keys)"""
+        parent = employees['manager_row'].to_numpy().astype(np.int64)
+        return cls(_cut_cycles(parent))
+
+    def direct_report_counts(self, mask=None):
+        """Direct reports per row, counting only reports where mask is True"""
+        reports = self.parent >= 0 if mask is None else (self.parent >= 0) & mask
+        return np.bincount(self.parent[reports], minlength=len(self.parent))
+
+    def subtree_rows(self, row):
+        """Rows in the subtree of row (the row itself first)"""
+        return self.order[self.tin[row]:self.tin[row] + self.size[row]]
+
+    def prefix(self, values):
+        """Prefix sums of values (per row) in tour order, for subtree_sums()"""
+        return np.concatenate([[0], np.cumsum(np.asarray(values, dtype=float)[self.order])])
+
+    def subtree_sums(self, prefix, rows=None):
+        """Sum over each subtree of rows (default every row), from a prefix() array"""
+        tin = self.tin if rows is None else self.tin[rows]
+        size = self.size if rows is None else self.size[rows]
+        return prefix[tin + size] - prefix[tin]
+
+
+def _cut_cycles(parent):
+    """parent with every manager_id cycle broken at its lowest row, which becomes a root
+
+    The rest of the cycle keeps its reporting lines, as a chain under that row.
+    """
+    parent = parent.copy()
+    rows = np.arange(len(parent))
+    steps = int(np.ceil(np.log2(max(len(parent), 2)))) + 1
+
+    # Pointer jumping: after log2(n) doublings every row points at its root,
+    # or at a row on a cycle if its chain of managers loops
+    jump = np.where(parent >= 0, parent, rows)
+    for _ in range(steps):
+        jump = jump[jump]
+    on_cycle = np.zeros(len(parent), dtype=bool)
+    on_cycle[jump[parent[jump] >= 0]] = True
+    if not on_cycle.any():
+        return parent
+
+    # Every row reached from a cycle row is on the same cycle, so the minimum
+    # over 2^steps successors is the lowest row of the whole cycle
+    lowest, successor = np.where(on_cycle, rows, len(parent)), np.where(on_cycle, parent, rows)
+    for _ in range(steps):
+        lowest = np.minimum(lowest, lowest[successor])
+        successor = successor[successor]
+    parent[on_cycle & (lowest == rows)] = -1
+    return parent
@@ -0,0 +1,95 @@
+"""
+Performance Timers
+Named wall-clock timers around the dashboard's pipeline stages (data load,
+filtering, KPIs, red flags, each tab). Recording is cheap enough to stay on;
+benchmark.py reads the samples after each scripted rerun. object_bytes()
+sizes the shared dataset and per-session state for the memory metrics.
+"""
+
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+_samples = defaultdict(list)  # stage name -> list of durations (seconds)
+_gauges = {}  # name -> latest value (e.g. bytes); process-wide, whichever session set it last
+_lock = threading.Lock()
+
+
+@contextmanager
+def timed(name):
+    """Record the wall-clock duration of the with-block under name"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            _samples[name].append(elapsed)
+
+
+def samples():
+    """Copy of every recorded duration per stage"""
+    with _lock:
+        return {name: list(values) for name, values in _samples.items()}
+
+
+def set_gauge(name, value):
+    """Record the latest value of a non-timing measurement"""
+    with _lock:
+        _gauges[name] = value
+
+
+def gauges():
+    """Latest value of every gauge, across all sessions of the process"""
+    with _lock:
+        return dict(_gauges)
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _gauges.clear()
+
+
+def summarize(durations):
+    """count/total/mean/p50/p95/max (seconds) of a list of durations"""
+    values = np.asarray(durations, dtype=float)
+    return {
+        'count': int(values.size),
+        'total': float(values.sum()),
+        'mean': float(values.mean()),
+        'p50': float(np.percentile(values, 50)),
+        'p95': float(np.percentile(values, 95)),
+        'max': float(values.max()),
+    }
+
+
+def summary():
+    """Per-stage statistics of everything recorded since the last reset()"""
+    return {name: summarize(values) for name, values in samples().items() if values}
+
+
+def object_bytes(obj, _seen=None):
+    """Approximate resident size of obj, following containers and object attributes once each"""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(index=True, deep=True)
+        return int(usage.sum() if isinstance(obj, pd.DataFrame) else usage)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(object_bytes(k, seen) + object_bytes(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(object_bytes(v, seen) for v in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += object_bytes(vars(obj), seen)
+    return size
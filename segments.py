@@ -0,0 +1,98 @@
+"""
+Segment Grid
+KPIs for every country x department x seniority x job family segment at once,
+including the segments where one or more dimensions are left open ("Alle").
+The cube and timeline arrays get one extra slot per dimension holding the sum
+over that dimension, so a single array pass over the summed grid yields every
+combination; kpis_from_totals() and kpis_from_window() derive the KPIs from
+it exactly as they do for a single filter selection. peer_values() lines up
+every segment with its peers along chosen dimensions for comparisons, and
+member_keys() tells which segments hold the same employees.
+"""
+
+import numpy as np
+
+from cube import MEASURES, kpis_from_totals
+from data_store import FILTER_DIMENSIONS
+from timeline import kpis_from_window
+
+
+def with_all_slots(values, n_dims=len(FILTER_DIMENSIONS)):
+    """values with a summed slot appended to each of its first n_dims axes"""
+    for axis in range(n_dims):
+        values = np.concatenate([values, values.sum(axis=axis, keepdims=True)], axis=axis)
+    return values
+
+
+def segment_totals(dataset, start=None, end=None):
+    """(cube totals, window totals) for every segment, as dicts of grid arrays
+
+    Every array has one axis per FILTER_DIMENSIONS entry, of length
+    len(categories) + 1; the last position is the open ("Alle") slot.
+    """
+    cube_totals = dict(zip(MEASURES, np.moveaxis(with_all_slots(dataset.cube.values), -1, 0)))
+    window_totals = dataset.timeline.window_cells(start, end, with_all_slots(dataset.timeline.values))
+    return cube_totals, window_totals
+
+
+def segment_kpis(totals, position=None):
+    """KPIs from segment_totals(), as calculate_kpis() returns them for the same selection
+
+    Arrays for the whole grid, or with position (a grid index) the plain
+    KPI dict of that one segment.
+    """
+    cube_totals, window_totals = totals
+    if position is not None:
+        cube_totals = {k: float(v[position]) for k, v in cube_totals.items()}
+        window_totals = {k: float(v[position]) if np.ndim(v) else v for k, v in window_totals.items()}
+    kpis = kpis_from_totals(cube_totals)
+    kpis.update(kpis_from_window(window_totals))
+    return kpis
+
+
+def segment_labels(categories, open_value):
+    """Per dimension, the value of every grid position: the categories, then open_value"""
+    return {dim: list(categories[dim]) + [open_value] for dim in FILTER_DIMENSIONS}
+
+
+def concrete(values, axes):
+    """values without the open slot on each of axes"""
+    return values[tuple(slice(0, -1) if axis in axes else slice(None) for axis in range(values.ndim))]
+
+
+def peer_values(values, axes):
+    """(own, peers): values at the concrete positions of axes, and their peers on a trailing axis
+
+    The peers of a position are the other concrete positions along each of
+    axes with everything else equal, e.g. the same department in the other
+    countries followed by the same country in the other departments.
+    """
+    own = concrete(values, axes)
+    peers = []
+    for axis in axes:
+        n = own.shape[axis]
+        others = np.array([[j for j in range(n) if j != i] for i in range(n)], dtype=int).reshape(n, n - 1)
+        # take() puts the (position, peer) index axes where axis was; move the peer axis last
+        peers.append(np.moveaxis(np.take(own, others, axis=axis), axis + 1, -1))
+    return own, np.concatenate(peers, axis=-1)
+
+
+def member_keys(dataset):
+    """Per grid position, an id shared by exactly the segments that hold the same cube cells
+
+    A segment open on a dimension holds the same cells as its one non-empty
+    value along it, if there is only one (e.g. all job families of a
+    department that only has Specialists); the id is the flat grid index of
+    the segment with every such open slot narrowed down.
+    """
+    timeline = dataset.timeline.values
+    occupied = (dataset.cube.values != 0).any(axis=-1) | (timeline != 0).any(axis=(-2, -1))
+    grid = with_all_slots(occupied.astype(np.int64)) > 0
+    narrowed = list(np.indices(grid.shape))
+    for axis in range(grid.ndim):
+        children = concrete(grid, [axis])
+        single = children.sum(axis=axis, keepdims=True) == 1
+        only = children.argmax(axis=axis, keepdims=True)
+        is_open = narrowed[axis] == grid.shape[axis] - 1
+        narrowed[axis] = np.where(is_open & single, only, narrowed[axis])
+    return np.ravel_multi_index(narrowed, grid.shape)
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_PATH)
+
+from dataset import load_dataset  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def dataset():
+    """The shipped data set (the CSV files in the repository root)"""
+    return load_dataset(BASE_PATH)
@@ -0,0 +1,28 @@
+import os
+
+import pandas as pd
+import pytest
+
+import data_store
+
+
+def _write_table(data_path, rows, parquet_age_ns):
+    """sick_leave.csv with rows, and a Parquet copy with one row whose mtime is parquet_age_ns older/newer"""
+    pd.DataFrame({'employee_id': ['EMP-PARQUET']}).to_parquet(data_store.parquet_path(data_path, 'sick_leave'))
+    pd.DataFrame({'employee_id': rows}).to_csv(data_store.csv_path(data_path, 'sick_leave'), index=False)
+    csv_mtime = os.stat(data_store.csv_path(data_path, 'sick_leave')).st_mtime_ns
+    os.utime(data_store.parquet_path(data_path, 'sick_leave'), ns=(csv_mtime - parquet_age_ns,) * 2)
+
+
+def test_fresh_parquet_copy_is_read(tmp_path):
+    _write_table(tmp_path, ['EMP-CSV'], parquet_age_ns=-10**9)
+    assert data_store.source_path(tmp_path, 'sick_leave').endswith('.parquet')
+    assert data_store.read_table(tmp_path, 'sick_leave')['employee_id'].tolist() == ['EMP-PARQUET']
+
+
+def test_stale_parquet_copy_falls_back_to_csv(tmp_path):
+    _write_table(tmp_path, ['EMP-CSV'], parquet_age_ns=10**9)
+    with pytest.warns(UserWarning, match='older than'):
+        assert data_store.source_path(tmp_path, 'sick_leave').endswith('.csv')
+    with pytest.warns(UserWarning):
+        assert data_store.read_table(tmp_path, 'sick_leave')['employee_id'].tolist() == ['EMP-CSV']
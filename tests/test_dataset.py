@@ -0,0 +1,38 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import hr_engine
+from conftest import BASE_PATH
+from dataset import DataSource, load_dataset
+
+
+def _append_lines(data_path, name, lines):
+    with open(data_store.csv_path(data_path, name), 'a') as f:
+        f.write(''.join(line + '\n' for line in lines))
+
+
+def test_appended_rows_give_the_same_dataset_as_a_full_load(tmp_path, dataset):
+    for name in data_store.TABLES:
+        shutil.copy(data_store.csv_path(BASE_PATH, name), tmp_path)
+    source = DataSource(str(tmp_path))
+    leaver, other = dataset.employees.loc[dataset.active, 'employee_id'].iloc[[0, 1]]
+    # A new month of sick leave, one more row for an existing month, and a leaver the employee table lacks
+    _append_lines(tmp_path, 'sick_leave', [f'{leaver},2025,1,4.0,Short-term', f'{other},2025,1,12.0,Long-term',
+                                           f'{other},2024,6,2.5,Short-term'])
+    _append_lines(tmp_path, 'terminations', [f'{leaver},2025-01-20,Voluntary,3,True,650000,4.0,650000.0'])
+
+    assert source.refresh() == 'appended'
+    appended, loaded = source.dataset, load_dataset(str(tmp_path))
+
+    columns = [c for c in loaded.employees.columns if c != 'employee_row']
+    pd.testing.assert_frame_equal(appended.employees[columns], loaded.employees[columns])
+    np.testing.assert_array_equal(appended.active, loaded.active)
+    np.testing.assert_allclose(appended.cube.values, loaded.cube.values)
+    assert appended.timeline.first_month == loaded.timeline.first_month
+    np.testing.assert_allclose(appended.timeline.values, loaded.timeline.values)
+    for spec in [hr_engine.FilterSpec(), hr_engine.FilterSpec(department='Engineering'),
+                 hr_engine.FilterSpec(date_range=(pd.Timestamp('2024-07-01'), pd.Timestamp('2025-01-31')))]:
+        assert hr_engine.calculate_kpis(appended, spec) == hr_engine.calculate_kpis(loaded, spec)
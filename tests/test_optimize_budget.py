@@ -0,0 +1,47 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import hr_engine
+
+
+@pytest.mark.parametrize('spec', [
+    hr_engine.FilterSpec('Danmark', 'Customer Support', 'VP', 'Executive'),  # No High flight risk employees
+    hr_engine.FilterSpec(country='Atlantis'),  # No employees at all
+])
+def test_segment_without_high_risk_employees_gets_empty_allocation(dataset, spec):
+    allocation, totals = hr_engine.optimize_budget(dataset, spec, 1_000_000)
+    assert allocation.empty
+    assert totals['cells'] == 0
+    assert totals['cost'] == totals['saved'] == totals['net_benefit'] == 0
+
+
+def _brute_force(weight, net, capacity):
+    """Best total net of one option per row within capacity, trying every combination"""
+    best = -np.inf
+    for picked in itertools.product(*(range(weight.shape[1]) for _ in weight)):
+        rows = np.arange(len(weight))
+        if weight[rows, picked].sum() <= capacity:
+            best = max(best, net[rows, picked].sum())
+    return best
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_pick_options_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n_rows, n_options, capacity = rng.integers(1, 5), rng.integers(2, 5), int(rng.integers(0, 15))
+    weight = rng.integers(0, 8, size=(n_rows, n_options))
+    net = rng.normal(size=(n_rows, n_options)).round(2)
+    weight[:, 0], net[:, 0] = 0, 0  # Column 0 is "do nothing"
+    picked = hr_engine._pick_options(weight, net, capacity)
+    rows = np.arange(n_rows)
+    assert weight[rows, picked].sum() <= capacity
+    assert net[rows, picked].sum() == pytest.approx(_brute_force(weight, net, capacity))
+
+
+@pytest.mark.parametrize('budget', [0, 50_000, 500_000, 5_000_000])
+def test_allocation_stays_within_budget(dataset, budget):
+    allocation, totals = hr_engine.optimize_budget(dataset, hr_engine.FilterSpec(), budget)
+    assert totals['cost'] <= budget
+    assert (allocation['net_benefit'] > 0).all()
@@ -0,0 +1,20 @@
+import numpy as np
+
+from org_tree import OrgTree, _cut_cycles
+
+
+def test_cycle_is_cut_once_into_a_chain():
+    # 0 -> 1 -> 2 -> 0 is a cycle; 4 reports to the root 3
+    assert _cut_cycles(np.array([1, 2, 0, -1, 3])).tolist() == [-1, 2, 0, -1, 3]
+
+
+def test_every_cycle_is_cut_at_its_lowest_row():
+    # Two cycles (1 <-> 3, and the self-loop 5), with 0 and 4 hanging off them
+    parent = np.array([3, 3, -1, 1, 5, 5])
+    assert _cut_cycles(parent).tolist() == [3, -1, -1, 1, 5, -1]
+
+
+def test_tree_over_cut_cycle_keeps_the_reporting_lines():
+    tree = OrgTree(_cut_cycles(np.array([1, 2, 0, -1, 3])))
+    assert tree.size.tolist() == [3, 1, 2, 2, 1]
+    assert sorted(tree.subtree_rows(0).tolist()) == [0, 1, 2]
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import hr_engine
+
+
+@pytest.mark.parametrize('name', ['turnover_rate', 'flight_risk_pct', 'internal_mobility'])
+@pytest.mark.parametrize('headcount', [hr_engine.PEER_MIN_HEADCOUNT, 19, 40])
+def test_single_event_in_small_segment_is_not_an_outlier(name, headcount):
+    # One leaver / high-risk employee / mover in a year, against peers that agree closely
+    value = 100 / headcount
+    peers = np.array([[[0.0, 0.0, 0.1, 0.2, 0.0, 0.1, 0.0, 0.3]]])
+    z, _, _ = hr_engine.peer_z_scores([name], np.array([[value]]), np.array([[headcount]]), peers, 1)
+    assert abs(z[0, 0]) < hr_engine.PEER_Z_WARNING
+
+
+def test_storyline_segment_is_still_found(dataset):
+    flags = hr_engine.peer_anomalies(dataset, pd.Timestamp('2024-01-01'), pd.Timestamp('2024-12-31'))
+    segment = {'country': 'Tyskland', 'department': 'Engineering',
+               'seniority_level': hr_engine.ALL, 'job_family': hr_engine.ALL}
+    assert any(flag['metric'] == 'engagement' and flag['segment'] == segment for flag in flags)
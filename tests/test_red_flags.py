@@ -0,0 +1,40 @@
+import pandas as pd
+
+import hr_engine
+import segments
+
+
+def test_bradford_rule_does_not_flag_most_segments(dataset):
+    kpis = segments.segment_kpis(segments.segment_totals(dataset))
+    eligible = kpis['headcount'] >= hr_engine.SCAN_MIN_HEADCOUNT
+    flagged = hr_engine.scan_segments(dataset)
+    bradford = (flagged['metric'] == 'bradford').sum()
+    assert 0 < bradford < 0.5 * eligible.sum()
+
+
+def test_bradford_rule_leaves_the_whole_organisation_unflagged(dataset):
+    kpis = hr_engine.calculate_kpis(dataset, hr_engine.FilterSpec())
+    assert 'bradford' not in [flag['metric'] for flag in hr_engine.detect_red_flags(kpis)]
+
+
+def test_distinct_segments_with_equal_headcount_and_value_are_both_flagged(dataset):
+    flagged = hr_engine.scan_segments(dataset).set_index(['country', 'department', 'seniority_level', 'job_family'])
+    flight_risk = flagged[flagged['metric'] == 'flight_risk']
+    # 6 of 26 employees in both, but not the same employees
+    pair = flight_risk.loc[[('Danmark', 'Engineering', 'Lead', hr_engine.ALL),
+                            ('Danmark', 'Sales', 'Senior', hr_engine.ALL)]]
+    assert pair['headcount'].tolist() == [26, 26]
+    assert pair['value'].round(9).nunique() == 1
+
+
+def test_widest_segments_keeps_distinct_members_apart():
+    flagged = pd.DataFrame({
+        'country': ['Norge', 'Norge', 'Sverige'],
+        'department': [hr_engine.ALL, 'Sales', 'Sales'],
+        'seniority_level': hr_engine.ALL,
+        'job_family': hr_engine.ALL,
+        'rule': 0,
+        '_members': [1, 1, 2],  # Norge only has Sales; Sverige is other employees
+    })
+    kept = hr_engine._widest_segments(flagged, ['rule'])
+    assert sorted(zip(kept['country'], kept['department'])) == [('Norge', hr_engine.ALL), ('Sverige', 'Sales')]
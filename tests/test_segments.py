@@ -0,0 +1,18 @@
+import numpy as np
+
+import segments
+
+
+def test_member_keys_match_the_cube_cells_each_segment_holds(dataset):
+    occupied = (dataset.cube.values != 0).any(axis=-1) | (dataset.timeline.values != 0).any(axis=(-2, -1))
+    keys = segments.member_keys(dataset)
+    cells = {}
+    for position in np.ndindex(keys.shape):
+        # The open slot (last position) of a dimension selects all its categories
+        selection = tuple(slice(None) if p == n - 1 else slice(p, p + 1) for p, n in zip(position, keys.shape))
+        mask = np.zeros_like(occupied)
+        mask[selection] = True
+        held = frozenset(np.flatnonzero(mask & occupied))
+        if held:
+            assert cells.setdefault(held, keys[position]) == keys[position]
+    assert len(set(cells.values())) == len(cells)
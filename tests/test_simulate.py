@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import hr_engine
+
+
+def test_empty_segment(dataset):
+    segment = hr_engine.high_risk_segment(dataset, hr_engine.FilterSpec(country='Atlantis'))
+    result = hr_engine.simulate(segment, 5, 10, True)
+    assert result['current_high_risk'] == 0
+    assert result['expected_leavers'] == result['projected_saved_turnover'] == 0
+    assert result['intervention_cost'] == hr_engine.ENGAGEMENT_PROGRAM_COST
+    assert np.all(result['net_benefit_trials'] == -result['intervention_cost'])
+
+
+def test_zero_risk_segment_saves_nothing(dataset):
+    segment = hr_engine.high_risk_segment(dataset, hr_engine.FilterSpec(department='Engineering'))
+    segment = segment.assign(flight_risk=segment['flight_risk'].cat.set_categories(['Unknown']))  # No leaving probability
+    result = hr_engine.simulate(segment, 5, 10, False)
+    assert result['current_high_risk'] == len(segment) > 0
+    assert result['expected_leavers'] == result['current_turnover_cost'] == 0
+    assert result['total_risk_reduction'] == 0
+    assert result['net_benefit'] == pytest.approx(-result['intervention_cost'])
+    assert result['profitable_share'] == 0
+
+
+def test_interventions_never_raise_the_turnover_cost(dataset):
+    segment = hr_engine.high_risk_segment(dataset, hr_engine.FilterSpec(department='Engineering'))
+    result = hr_engine.simulate(segment, 10, 20, True)
+    assert result['projected_saved_turnover'] >= 0
+    assert result['net_benefit_p10'] <= result['net_benefit_p50'] <= result['net_benefit_p90']
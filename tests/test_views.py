@@ -0,0 +1,28 @@
+import pytest
+
+import hr_engine
+
+NO_ONE = hr_engine.FilterSpec(country='Atlantis')
+NO_MEN = hr_engine.FilterSpec('Danmark', 'Customer Support', 'VP', 'Executive')
+
+
+@pytest.mark.parametrize('spec', [NO_ONE, NO_MEN])
+def test_overview_and_compensation_handle_small_selections(dataset, spec):
+    overview = hr_engine.overview(dataset, spec)
+    compensation = hr_engine.compensation(dataset, spec)
+    assert (overview['top_dept'] is None) == (spec is NO_ONE)
+    assert (compensation['gender_pay_gap']['gap_pct'] == 0).all()
+
+
+def test_empty_selection_overview_is_blank(dataset):
+    overview = hr_engine.overview(dataset, NO_ONE)
+    assert overview['top_country'] is None and overview['lowest_eng_dept'] is None
+    assert overview['top_dept_pct'] == overview['eng_gap'] == 0
+
+
+@pytest.mark.parametrize('spec', [NO_ONE, NO_MEN])
+@pytest.mark.parametrize('question', ['lønn', 'turnover', 'engasjement', 'sykefravær', 'rekruttering', 'kjønn',
+                                      'flight risk', 'hei'])
+def test_chat_answers_small_selections(dataset, spec, question):
+    answer, _ = hr_engine.answer_question(dataset, spec, question)
+    assert answer.strip()
@@ -0,0 +1,235 @@
+"""
+Event Timeline
+Monthly event counts per country x department x seniority x job family cell,
+built once at load time. Every hire is a +1 event and every termination a -1
+event; bucketing them by month and taking a cumulative sum gives the
+headcount at the end of every month in one pass. Headcount, average
+headcount and turnover for any filter selection and date window are then
+sums over the selected cells, with no per-month scan of the employees.
+Rows appended to the source tables later are bucketed the same way and added
+to a copy of the array (add_events), so ingesting them needs no rebuild.
+
+Windows have month resolution: a date range covers every month it touches.
+"""
+
+import numpy as np
+import pandas as pd
+
+from cube import WORKING_DAYS_PER_YEAR, _cell_index, _count, _ratio, _selection_index
+from data_store import FILTER_DIMENSIONS
+
+# Monthly sums per cell
+SERIES = [
+    'hires', 'terminations',  # Employee table events (+1 / -1)
+    'voluntary_terminations', 'replacement_cost',  # Terminations table
+    'sick_days',  # Sick leave (monthly rollup, all employees)
+    'requisitions', 'days_to_fill_sum',  # Recruitment table, by close date
+]
+
+
+def _month_number(dates):
+    """Running month number (year * 12 + month - 1) per date; -1 for missing dates"""
+    dates = pd.DatetimeIndex(dates)
+    months = dates.year.to_numpy(dtype=np.int64, na_value=0) * 12 + dates.month.to_numpy(dtype=np.int64, na_value=1) - 1
+    return np.where(dates.isna(), -1, months)
+
+
+class EventTimeline:
+    """Dense array of monthly event sums indexed by the four filter dimensions"""
+
+    def __init__(self, categories, first_month, values, sick_coverage):
+        self.categories = categories  # dimension -> list of category values
+        self.first_month = first_month  # Running month number of values[..., 0, :]
+        self.values = values  # cube shape + (n_months, len(SERIES))
+        self.sick_coverage = sick_coverage  # Per month: the sick leave table has records for it
+
+    @property
+    def n_months(self):
+        return self.values.shape[-2]
+
+    @property
+    def months(self):
+        """First day of every month on the timeline"""
+        first = pd.Timestamp(year=self.first_month // 12, month=self.first_month % 12 + 1, day=1)
+        return pd.date_range(first, periods=self.n_months, freq='MS')
+
+    @classmethod
+    def build(cls, employees, sick_monthly, recruitment, terminations):
+        """Bucket all events by cell and month; sick_monthly is the absence.monthly_rollup() frame"""
+        categories = {dim: list(employees[dim].cat.categories) for dim in FILTER_DIMENSIONS}
+        shape = tuple(len(categories[dim]) for dim in FILTER_DIMENSIONS)
+        empty = cls(categories, 0, np.zeros(shape + (0, len(SERIES))), np.zeros(0, dtype=bool))
+        every = np.arange(len(employees))
+        return empty.add_events(table_events(categories, employees, every, every, sick_monthly, recruitment, terminations))
+
+    def add_events(self, events):
+        """New timeline with events (from table_events()) added, widened to every month they touch"""
+        if not events:
+            return self
+        months = np.concatenate([m[m >= 0] for _, m, _ in events.values()])
+        first_month, last_month = self.first_month, self.first_month + self.n_months - 1
+        if self.n_months == 0:
+            first_month, last_month = (int(months.min()), int(months.max())) if len(months) else (0, 0)
+        elif len(months):
+            first_month, last_month = min(first_month, int(months.min())), max(last_month, int(months.max()))
+        n_months = last_month - first_month + 1
+        n_cells = int(np.prod(self.values.shape[:-2]))
+
+        # Existing sums, placed in the (possibly) wider month range
+        offset = self.first_month - first_month
+        values = np.zeros((n_cells, n_months, len(SERIES)))
+        values[:, offset:offset + self.n_months] = self.values.reshape(n_cells, self.n_months, len(SERIES))
+        sick_coverage = np.zeros(n_months, dtype=bool)
+        sick_coverage[offset:offset + self.n_months] = self.sick_coverage
+
+        # One bincount over (cell, month, series); events with an unknown cell or month are skipped
+        flat, weights = [], []
+        for series, (cells, months, w) in events.items():
+            ok = (cells >= 0) & (months >= 0)
+            flat.append((cells[ok] * n_months + (months[ok] - first_month)) * len(SERIES) + SERIES.index(series))
+            weights.append(np.ones(int(ok.sum())) if w is None else np.asarray(w, dtype=float)[ok])
+            if series == 'sick_days':
+                sick_coverage[np.unique(months[ok]) - first_month] = True
+        values += np.bincount(np.concatenate(flat), weights=np.concatenate(weights),
+                              minlength=values.size).reshape(values.shape)
+        shape = self.values.shape[:-2] + (n_months, len(SERIES))
+        return EventTimeline(self.categories, first_month, values.reshape(shape), sick_coverage)
+
+    def _sums(self, selection, by=None):
+        """Monthly sums over the selected cells, shape (groups, n_months, len(SERIES))
+
+        With by=None there is one group; otherwise one per selected value of
+        that dimension, in category order.
+        """
+        block = self.values[np.ix_(*_selection_index(self.categories, selection))]
+        if by is None:
+            return block.reshape(1, -1, self.n_months, len(SERIES)).sum(axis=1)
+        block = np.moveaxis(block, FILTER_DIMENSIONS.index(by), 0)
+        return block.reshape(block.shape[0], -1, self.n_months, len(SERIES)).sum(axis=1)
+
+    def series(self, selection):
+        """Monthly sums for selection plus end-of-month headcount, one row per month"""
+        return self._monthly(self._sums(selection)[0])
+
+    def _monthly(self, sums):
+        monthly = pd.DataFrame(sums, columns=SERIES, index=self.months)
+        # Event sweep: hires +1, terminations -1, cumulative over time
+        monthly['headcount'] = (monthly['hires'] - monthly['terminations']).cumsum()
+        monthly['headcount_start'] = monthly['headcount'] - monthly['hires'] + monthly['terminations']
+        return monthly
+
+    def window_slice(self, start=None, end=None):
+        """Positional slice of the months touched by [start, end] (None = open ended)"""
+        lo = 0 if start is None else _month_number([start])[0] - self.first_month
+        hi = self.n_months if end is None else _month_number([end])[0] - self.first_month + 1
+        return slice(int(np.clip(lo, 0, self.n_months)), int(np.clip(hi, 0, self.n_months)))
+
+    def window(self, selection, start=None, end=None):
+        """Summed events, start/end/average headcount and month count for selection within [start, end]"""
+        return self._window_totals(self.series(selection), self.window_slice(start, end))
+
+    def window_by(self, dim, selection, start=None, end=None):
+        """window() totals per value of dim within selection, as a DataFrame indexed by value"""
+        index = _selection_index(self.categories, selection)[FILTER_DIMENSIONS.index(dim)]
+        window = self.window_slice(start, end)
+        rows = [self._window_totals(self._monthly(sums), window) for sums in self._sums(selection, by=dim)]
+        return pd.DataFrame(rows, index=pd.Index([self.categories[dim][i] for i in index], name=dim))
+
+    def window_cells(self, start=None, end=None, values=None):
+        """window() totals for every cell at once, as arrays shaped like the cells
+
+        values defaults to the timeline's own array; any array with the same
+        trailing (months, series) axes works, e.g. one with summed slots added.
+        """
+        values = self.values if values is None else values
+        window = self.window_slice(start, end)
+        hires, terminations = values[..., SERIES.index('hires')], values[..., SERIES.index('terminations')]
+        headcount = np.cumsum(hires - terminations, axis=-1)
+        headcount_start = headcount - hires + terminations
+        sums = values[..., window, :].sum(axis=-2)
+        totals = {series: sums[..., i] for i, series in enumerate(SERIES)}
+        totals['months'] = window.stop - window.start
+        if totals['months'] == 0:
+            empty = np.zeros(values.shape[:-2])
+            totals.update(headcount_start=empty, headcount_end=empty, avg_headcount=empty, sick_headcount_months=empty)
+            return totals
+        month_headcount = (headcount_start[..., window] + headcount[..., window]) / 2
+        totals['headcount_start'] = headcount_start[..., window.start]
+        totals['headcount_end'] = headcount[..., window.stop - 1]
+        totals['avg_headcount'] = month_headcount.mean(axis=-1)
+        # Sick leave rates only count the months the sick leave table covers
+        totals['sick_headcount_months'] = month_headcount[..., self.sick_coverage[window]].sum(axis=-1)
+        return totals
+
+    def _window_totals(self, monthly, window):
+        monthly = monthly.iloc[window]
+        totals = monthly[SERIES].sum().to_dict()
+        totals['months'] = len(monthly)
+        if len(monthly) == 0:
+            totals.update(headcount_start=0.0, headcount_end=0.0, avg_headcount=0.0, sick_headcount_months=0.0)
+            return totals
+        month_headcount = (monthly['headcount_start'] + monthly['headcount']) / 2
+        totals['headcount_start'] = float(monthly['headcount_start'].iloc[0])
+        totals['headcount_end'] = float(monthly['headcount'].iloc[-1])
+        totals['avg_headcount'] = float(month_headcount.mean())
+        # Sick leave rates only count the months the sick leave table covers
+        totals['sick_headcount_months'] = float(month_headcount[self.sick_coverage[window]].sum())
+        return totals
+
+
+def table_events(categories, employees, hires=None, leavers=None, sick_monthly=None, recruitment=None, terminations=None):
+    """(cells, months, weights) per SERIES from the given table rows, for EventTimeline.add_events()
+
+    hires / leavers are the employee rows whose hire / termination is counted;
+    sick_monthly is an absence.monthly_rollup() frame. Tables left as None
+    contribute no events.
+    """
+    shape = tuple(len(categories[dim]) for dim in FILTER_DIMENSIONS)
+    emp_cell = _cell_index(employees, categories, shape)
+    events = {}
+    if hires is not None:
+        events['hires'] = (emp_cell[hires], _month_number(employees['hire_date'].iloc[hires]), None)
+    if leavers is not None:
+        events['terminations'] = (emp_cell[leavers], _month_number(employees['termination_date'].iloc[leavers]), None)
+    if terminations is not None:
+        term_rows = terminations['employee_row'].to_numpy()
+        term_cell = np.where(term_rows >= 0, emp_cell[term_rows], -1)
+        term_month = _month_number(terminations['termination_date'])
+        voluntary = (terminations['termination_reason'] == 'Voluntary').to_numpy()
+        events['voluntary_terminations'] = (term_cell[voluntary], term_month[voluntary], None)
+        events['replacement_cost'] = (term_cell, term_month, terminations['replacement_cost'].to_numpy(dtype=float))
+    if sick_monthly is not None:
+        events['sick_days'] = (emp_cell[sick_monthly['row'].to_numpy()], sick_monthly['period'].to_numpy(),
+                               sick_monthly['sick_days'].to_numpy(dtype=float))
+    if recruitment is not None:
+        recruit_cell = _cell_index(recruitment, categories, shape)
+        recruit_month = _month_number(recruitment['close_date'])
+        events['requisitions'] = (recruit_cell, recruit_month, None)
+        events['days_to_fill_sum'] = (recruit_cell, recruit_month, recruitment['days_to_fill'].to_numpy(dtype=float))
+    return events
+
+
+def monthly_turnover(monthly):
+    """Annualized turnover rate (%) per month from series() output"""
+    avg_headcount = (monthly['headcount_start'] + monthly['headcount']) / 2
+    return (monthly['terminations'] / avg_headcount.where(avg_headcount > 0) * 12 * 100).fillna(0)
+
+
+def kpis_from_window(w):
+    """Period KPIs from window() totals; these replace the all-time versions from the cube
+
+    Works on the per-cell arrays of window_cells() as well.
+    """
+    annualize = 12 / w['months'] if w['months'] else 0
+    kpis = {}
+    kpis['headcount'] = _count(w['headcount_end'])
+    kpis['avg_headcount'] = w['avg_headcount']
+    kpis['hires'] = _count(w['hires'])
+    kpis['terminations'] = _count(w['terminations'])
+    kpis['turnover_rate'] = _ratio(w['terminations'], w['avg_headcount'], 100) * annualize
+    kpis['voluntary_turnover'] = _count(w['voluntary_terminations'])
+    kpis['voluntary_turnover_rate'] = _ratio(w['voluntary_terminations'], w['avg_headcount'], 100) * annualize
+    kpis['cost_of_attrition'] = w['replacement_cost']
+    kpis['avg_time_to_hire'] = _ratio(w['days_to_fill_sum'], w['requisitions'])
+    kpis['sick_leave_rate'] = _ratio(w['sick_days'], WORKING_DAYS_PER_YEAR / 12 * w['sick_headcount_months'], 100)
+    return kpis